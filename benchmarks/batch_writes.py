@@ -0,0 +1,103 @@
+"""
+Syncing many transactions: one create request per transaction versus one
+batch request, through DRF and FastAPI.
+
+Usage:
+    python -m benchmarks.batch_writes [--items 500]
+
+Each timing covers ``--items`` creates, including authentication,
+categorization and the rollup updates; the query count is for the whole run.
+"""
+import argparse
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+
+from benchmarks.common import DESCRIPTIONS, make_user, test_database, timed
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from fastapi.testclient import TestClient
+
+import fastapi_app
+from transactions.models import Transaction
+
+
+def make_items(count, seed=7):
+    rng = random.Random(seed)
+    today = date.today()
+    return [
+        {
+            'date': (today - timedelta(days=rng.randrange(365))).isoformat(),
+            'description': rng.choice(DESCRIPTIONS),
+            'amount': f'{rng.randint(100, 50000) / 100:.2f}',
+        }
+        for _ in range(count)
+    ]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def test_database_file(tmp):
+    if connection.vendor == 'sqlite':
+        # FastAPI's pool threads need a database file they can all open
+        connection.settings_dict['TEST']['NAME'] = os.path.join(tmp, 'bench.sqlite3')
+    return test_database()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=500)
+    args = parser.parse_args()
+
+    # Authentication cost per request is part of the point, but not the hasher's
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    items = make_items(args.items)
+
+    with tempfile.TemporaryDirectory() as tmp, test_database_file(tmp):
+        user = make_user('bench')
+        drf = Client(HTTP_HOST='localhost')
+        drf.force_login(user)
+        api = TestClient(fastapi_app.app)
+        api.auth = ('bench', 'bench')
+
+        def drf_single():
+            for item in items:
+                assert drf.post('/api/transactions/', item, content_type='application/json').status_code == 201
+
+        def drf_batch():
+            response = drf.post('/api/transactions/batch/', {'create': items}, content_type='application/json')
+            assert len(response.json()['created']) == len(items)
+
+        def fastapi_single():
+            for item in items:
+                api.post('/transactions/', json={**item, 'amount': float(item['amount'])}).raise_for_status()
+
+        def fastapi_batch():
+            body = {'create': [{**item, 'amount': float(item['amount'])} for item in items]}
+            response = api.post('/transactions/batch/', json=body)
+            response.raise_for_status()
+            assert len(response.json()['created']) == len(items)
+
+        for label, run in [('DRF one request per item', drf_single), ('DRF batch', drf_batch),
+                           ('FastAPI one request per item', fastapi_single), ('FastAPI batch', fastapi_batch)]:
+            Transaction.objects.filter(user=user).delete()
+            queries = QueryCounter()
+            with connection.execute_wrapper(queries), timed(f'{label} ({args.items} items)'):
+                run()
+            # FastAPI runs its ORM calls on pool threads, which have their own connections
+            if label.startswith('DRF'):
+                print(f'{"":<50} {queries.count:10d} queries')
+
+
+if __name__ == '__main__':
+    main()
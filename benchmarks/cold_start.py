@@ -0,0 +1,65 @@
+"""
+Cold start of the Django app: what a fresh serverless worker pays before
+answering its first request.
+
+Usage:
+    python -m benchmarks.cold_start [--runs 5] [--path /accounts/login/]
+
+Every run is a new interpreter (nothing warm in sys.modules). It times
+loading the WSGI application (settings, app registry, django.setup()) and
+then the first request through the full middleware stack and URLconf, and
+lists the heavy optional libraries that ended up imported. The default
+path renders a template without touching the database.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ('pandas', 'numpy', 'plotly', 'pdfplumber', 'tabula', 'jpype')
+
+PROBE = '''
+import json, os, sys, time
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'budget_tracker.settings')
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+loaded = time.perf_counter()
+from django.test import Client
+status = Client().get(sys.argv[1], HTTP_HOST='localhost').status_code
+done = time.perf_counter()
+print(json.dumps({
+    'setup': (loaded - start) * 1000,
+    'first_request': (done - loaded) * 1000,
+    'status': status,
+    'heavy': [name for name in json.loads(sys.argv[2]) if name in sys.modules],
+}))
+'''
+
+
+def measure(path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE, path, json.dumps(HEAVY_MODULES)],
+        cwd=root, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/accounts/login/')
+    args = parser.parse_args()
+
+    runs = [measure(args.path) for _ in range(args.runs)]
+    for key, label in [('setup', 'get_wsgi_application()'), ('first_request', f'first GET {args.path}')]:
+        print(f'{label:<50} {statistics.median(run[key] for run in runs):10.2f} ms (median of {args.runs})')
+    print(f"{'status':<50} {runs[-1]['status']:>10}")
+    print(f"{'heavy modules loaded':<50} {', '.join(runs[-1]['heavy']) or 'none':>10}")
+
+
+if __name__ == '__main__':
+    main()
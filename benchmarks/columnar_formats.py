@@ -0,0 +1,51 @@
+"""
+Parquet versus CSV for whole-history export and re-import.
+
+Usage:
+    python -m benchmarks.columnar_formats [--rows 100000]
+
+Exports a user's ``--rows`` transactions in both formats, then imports
+each file into a fresh user, reporting file size and rows per second.
+Requires pyarrow.
+"""
+import argparse
+import io
+import time
+
+from benchmarks.common import make_transactions, make_user, test_database
+
+from transactions import columnar, exports, importers
+
+CSV_COLUMNS = {'date': 'date', 'description': 'description', 'amount': 'amount', 'category': 'category'}
+
+
+def rate(rows, seconds):
+    return f'{rows / seconds:10.0f} rows/s ({seconds * 1000:8.1f} ms)'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    with test_database():
+        source = make_user('bench')
+        make_transactions(source, args.rows)
+
+        for kind, load in [('csv', lambda user, f: importers.import_csv(user, f, CSV_COLUMNS)),
+                           ('parquet', columnar.import_parquet)]:
+            start = time.perf_counter()
+            body = b''.join(exports.stream(source, kind))
+            exported = time.perf_counter() - start
+            print(f'{kind:<8} size    {len(body) / 2**20:10.2f} MiB')
+            print(f'{kind:<8} export  {rate(args.rows, exported)}')
+
+            start = time.perf_counter()
+            result = load(make_user(f'import-{kind}'), io.BytesIO(body))
+            imported = time.perf_counter() - start
+            assert result.imported == args.rows, (result.imported, result.errors)
+            print(f'{kind:<8} import  {rate(args.rows, imported)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Each benchmark runs against a throwaway test database created from the
+configured DATABASES settings (SQLite by default, PostgreSQL when DB_NAME
+is set), so it never touches real data.
+"""
+import os
+import random
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'budget_tracker.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+
+from transactions.models import Category, Transaction
+
+DESCRIPTIONS = [
+    'Grocery store', 'Restaurant lunch', 'Taxi ride', 'Internet bill', 'Amazon order',
+    'Movie tickets', 'Cafe latte', 'Gas station', 'Salary deposit', 'Pharmacy',
+]
+
+
+@contextmanager
+def test_database():
+    """Create a fresh test database for the duration of the block"""
+    # DEBUG keeps every executed query in memory, which would skew timings and peaks
+    settings.DEBUG = False
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@contextmanager
+def timed(label, results=None):
+    """Print (and optionally record) the wall-clock time of the block in milliseconds"""
+    start = time.perf_counter()
+    yield
+    elapsed = (time.perf_counter() - start) * 1000
+    if results is not None:
+        results[label] = elapsed
+    print(f'{label:<50} {elapsed:10.2f} ms')
+
+
+def make_user(username='bench'):
+    return User.objects.create_user(username=username, password='bench')
+
+
+def make_transactions(user, count, years=5, batch_size=5000, seed=42):
+    """Insert ``count`` synthetic transactions spread over the last ``years`` years"""
+    rng = random.Random(seed)
+    categories = [Category.objects.get_or_create(name=name)[0] for name in ('Food', 'Transport', 'Shopping', 'Other')]
+    today = date.today()
+    span = 365 * years
+
+    batch = []
+    for i in range(count):
+        amount = Decimal(rng.randint(100, 50000)) / 100
+        if rng.random() < 0.1:
+            amount = -amount * 20
+        batch.append(Transaction(
+            user=user,
+            date=today - timedelta(days=rng.randrange(span)),
+            description=rng.choice(DESCRIPTIONS),
+            category=rng.choice(categories),
+            amount=amount,
+        ))
+        if len(batch) == batch_size:
+            Transaction.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Transaction.objects.bulk_create(batch)
+
+
+def statement_pdf(pages, lines_per_page=45, seed=42):
+    """A text-only PDF statement, one 'date description amount' line per transaction"""
+    rng = random.Random(seed)
+    start = date(2023, 1, 1)
+    page_count = pages
+
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % (4 + 2 * i) for i in range(page_count)), page_count
+        ),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    for page in range(page_count):
+        lines = []
+        for line in range(lines_per_page):
+            day = start + timedelta(days=page * lines_per_page + line)
+            lines.append(f'({day.isoformat()} {rng.choice(DESCRIPTIONS)} {rng.randint(100, 90000) / 100:.2f}) Tj T*')
+        stream = ('BT /F1 9 Tf 11 TL 40 800 Td ' + ' '.join(lines) + ' ET').encode()
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % (5 + 2 * page)
+        )
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
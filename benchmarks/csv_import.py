@@ -0,0 +1,62 @@
+"""
+Peak memory and throughput of the streaming CSV import for growing files.
+
+Usage:
+    python -m benchmarks.csv_import [--rows 10000 50000 200000]
+
+Peak Python heap (tracemalloc) should stay roughly constant as the file
+grows, since only one chunk is held in memory at a time.
+"""
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from benchmarks.common import DESCRIPTIONS, make_user, test_database
+
+from transactions import importers
+from transactions.models import Transaction
+
+COLUMNS = {'date': 'date', 'description': 'description', 'amount': 'amount'}
+
+
+def write_csv(path, rows, seed=42):
+    rng = random.Random(seed)
+    start = date(2015, 1, 1)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('date,description,amount\n')
+        for i in range(rows):
+            day = start + timedelta(days=rng.randrange(3650))
+            f.write(f'{day:%d-%m-%Y},{rng.choice(DESCRIPTIONS)} #{i},"${rng.randint(100, 900000) / 100:,.2f}"\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 50000, 200000])
+    args = parser.parse_args()
+
+    with test_database():
+        user = make_user()
+        print(f"{'rows':>10} {'file MB':>10} {'peak MB':>10} {'rows/s':>12}")
+        for rows in args.rows:
+            with tempfile.NamedTemporaryFile(suffix='.csv') as tmp:
+                write_csv(tmp.name, rows)
+                size_mb = tmp.seek(0, 2) / 1e6
+
+                with open(tmp.name, 'rb') as f:
+                    tracemalloc.start()
+                    start = time.perf_counter()
+                    result = importers.import_csv(user, f, COLUMNS)
+                    elapsed = time.perf_counter() - start
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+
+            assert result.imported == rows, result.errors
+            print(f'{rows:>10} {size_mb:>10.1f} {peak / 1e6:>10.1f} {rows / elapsed:>12.0f}')
+            Transaction.objects.filter(user=user).delete()
+
+
+if __name__ == '__main__':
+    main()
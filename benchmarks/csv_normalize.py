@@ -0,0 +1,100 @@
+"""
+Row-by-row (DataFrame.iterrows) versus vectorized CSV normalization.
+
+Usage:
+    python -m benchmarks.csv_normalize [--rows 100000]
+
+Only the parsing stage is measured (amount cleaning, date parsing, empty and
+zero filtering, duplicate-check tuples); nothing touches the database.
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import benchmarks.common  # noqa: F401  (configures Django)
+
+import pandas as pd
+
+from transactions import importers
+
+COLUMNS = {'date': 'date', 'description': 'description', 'amount': 'amount'}
+
+
+def make_frame(rows, seed=42):
+    rng = random.Random(seed)
+    start = date(2015, 1, 1)
+    dates, descriptions, amounts = [], [], []
+    for i in range(rows):
+        day = start + timedelta(days=rng.randrange(3650))
+        dates.append(f'{day:%d-%m-%Y}' if i % 2 else day.isoformat())
+        descriptions.append('' if i % 97 == 0 else f'Purchase {i}')
+        amounts.append('abc' if i % 101 == 0 else f'${rng.randint(-90000, 900000) / 100:,.2f}')
+    return pd.DataFrame({'date': dates, 'description': descriptions, 'amount': amounts})
+
+
+def iterrows_normalize(df):
+    """The per-row loop import_csv_view used before normalize_frame"""
+    rows = []
+    for _, row in df.iterrows():
+        raw_description = str(row.get('description', '')).strip()
+        if not raw_description:
+            continue
+        raw_amount = str(row.get('amount', '')).strip()
+        if not raw_amount:
+            continue
+        clean_amount = raw_amount.replace('$', '').replace(',', '').strip()
+        try:
+            amount = float(clean_amount)
+        except ValueError:
+            continue
+        if amount == 0:
+            continue
+        raw_date = str(row.get('date', '')).strip()
+        if not raw_date:
+            continue
+        try:
+            formatted_date = datetime.strptime(raw_date, '%d-%m-%Y').strftime('%Y-%m-%d')
+        except ValueError:
+            formatted_date = raw_date
+        try:
+            parsed_date = datetime.strptime(formatted_date, '%Y-%m-%d').date()
+        except ValueError:
+            continue
+        rows.append((parsed_date, raw_description, amount))
+    return rows
+
+
+def vectorized_normalize(df):
+    rows, _ = importers.normalize_frame(df, COLUMNS)
+    return list(zip(rows['date'].tolist(), rows['description'].tolist(), rows['amount'].tolist()))
+
+
+def best_of(func, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    legacy_time, legacy_rows = best_of(iterrows_normalize, df, args.repeat)
+    vector_time, vector_rows = best_of(vectorized_normalize, df, args.repeat)
+    assert len(legacy_rows) == len(vector_rows), (len(legacy_rows), len(vector_rows))
+
+    print(f'rows: {args.rows}, valid: {len(vector_rows)}')
+    print(f'iterrows    {legacy_time:8.3f} s  {args.rows / legacy_time:12.0f} rows/s')
+    print(f'vectorized  {vector_time:8.3f} s  {args.rows / vector_time:12.0f} rows/s')
+    print(f'speedup     {legacy_time / vector_time:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
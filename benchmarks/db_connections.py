@@ -0,0 +1,109 @@
+"""
+Database connections opened per 1,000 requests, with and without reuse.
+
+Usage:
+    python -m benchmarks.db_connections [--requests 1000]
+
+Django requests go through the WSGI handler (so request_started and
+request_finished recycle connections exactly as in production), FastAPI
+requests through its ASGI app and database thread pool. Each is run with
+CONN_MAX_AGE=0, the old behaviour of one connection per request, and with
+the configured DB_CONN_MAX_AGE and health checks. New connections are
+counted with the connection_created signal; "left open" counts the FastAPI
+thread connections still open after the app has shut down.
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import make_transactions, make_user, test_database
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from fastapi.testclient import TestClient
+
+import fastapi_app
+
+
+class ConnectionCounter:
+    def __init__(self):
+        self.opened = 0
+        self.wrappers = set()
+        connection_created.connect(self.created)
+
+    def created(self, sender, connection, **kwargs):
+        self.opened += 1
+        self.wrappers.add(connection)
+
+    def reset(self):
+        self.opened = 0
+        self.wrappers.clear()
+
+    def left_open(self):
+        return sum(1 for wrapper in self.wrappers if wrapper.connection is not None)
+
+
+def django_requests(count, cookie):
+    handler = WSGIHandler()
+    for _ in range(count):
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': '/api/transactions/summary/', 'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'HTTP_COOKIE': cookie,
+            'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+        }
+        response = handler(environ, lambda status, headers: None)
+        assert response.status_code == 200, response.status_code
+        response.close()  # Sends request_finished
+
+
+def fastapi_requests(count):
+    with TestClient(fastapi_app.app) as client:
+        for _ in range(count):
+            client.get('/transactions/', auth=('bench', 'bench')).raise_for_status()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+
+    # Authentication cost is not what is measured here
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    configured_max_age = connection.settings_dict['CONN_MAX_AGE']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if connection.vendor == 'sqlite':
+            # An in-memory test database is never really closed, so nothing would be reopened
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tmp, 'bench.sqlite3')
+        with test_database():
+            user = make_user('bench')
+            make_transactions(user, 1000)
+            client = Client()
+            client.force_login(user)
+            cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+            counter = ConnectionCounter()
+
+            for label, run in [('Django', lambda: django_requests(args.requests, cookie)),
+                               ('FastAPI', lambda: fastapi_requests(args.requests))]:
+                for max_age in (0, configured_max_age):
+                    connections.close_all()
+                    connection.settings_dict['CONN_MAX_AGE'] = max_age
+                    counter.reset()
+                    start = time.perf_counter()
+                    run()
+                    elapsed = (time.perf_counter() - start) * 1000 / args.requests
+                    opened = counter.opened * 1000 / args.requests
+                    left_open = counter.left_open() if label == 'FastAPI' else '-'
+                    print(f'{label:<8} CONN_MAX_AGE={max_age!s:<5} {opened:8.1f} connections per 1,000 requests'
+                          f'  {elapsed:6.2f} ms/request  left open: {left_open}')
+            connection.settings_dict['CONN_MAX_AGE'] = configured_max_age
+
+
+if __name__ == '__main__':
+    main()
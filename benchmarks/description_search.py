@@ -0,0 +1,84 @@
+"""
+Description search: a substring scan versus the full-text index.
+
+Usage:
+    python -m benchmarks.description_search [--rows 1000000] [--repeat 5]
+
+Fills the table with ``--rows`` transactions whose descriptions carry a
+merchant number plus a few old rows of a rare merchant, then times the
+first page of the list filtered by description and the ranked search,
+each answered by per-word ``icontains`` (what a search without the index
+does) and by transactions.search (GIN on PostgreSQL, FTS5 on SQLite).
+Reports the median of ``--repeat`` runs.
+"""
+import argparse
+import statistics
+import time
+from datetime import date
+
+from benchmarks.common import make_transactions, make_user, test_database
+
+from django.db import connection
+
+from transactions import search
+from transactions.models import Transaction
+from transactions.pagination import paginate
+
+QUERIES = ['blue bottle', 'latte', 'grocery 4']
+PLANTED = 25
+
+
+def substring(queryset, text):
+    for word in search.terms(text):
+        queryset = queryset.filter(description__icontains=word)
+    return queryset
+
+
+def substring_ranked(queryset, text):
+    return list(substring(queryset, text).order_by('-id').values_list('pk', flat=True)[:search.SEARCH_LIMIT])
+
+
+def median_ms(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with test_database():
+        user = make_user('bench')
+        # An old merchant: the rows a substring scan reaches last
+        Transaction.objects.bulk_create([
+            Transaction(user=user, date=date(2015, 1, day), description=f'Blue Bottle Coffee {day}', amount=5)
+            for day in range(1, PLANTED + 1)
+        ])
+        make_transactions(user, args.rows)
+        with connection.cursor() as cursor:
+            # Varied descriptions, as bank exports have ('Grocery store 4821')
+            cursor.execute(
+                f"UPDATE {Transaction._meta.db_table} SET description = description || ' ' || CAST(id %% 10000 AS TEXT)", []
+            )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {Transaction._meta.db_table}')
+
+        transactions = Transaction.objects.filter(user=user)
+        print(f'{connection.vendor}, {args.rows} rows, median of {args.repeat}')
+        for text in QUERIES:
+            for label, matching, ranked_ids in [('icontains', substring, substring_ranked),
+                                                ('full-text', search.matching, search.ranked_ids)]:
+                page = median_ms(lambda: paginate(matching(transactions, text), limit=20), args.repeat)
+                ranked = median_ms(lambda: ranked_ids(transactions, text), args.repeat)
+                print(f'{text!r:<14} {label:<10} list page {page:10.2f} ms   ranked {ranked:10.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Exporting a user's whole history: building it in memory versus streaming
+CSV/NDJSON from a server-side cursor.
+
+Usage:
+    python -m benchmarks.export_stream [--rows 200000]
+
+Reports the time to the first byte, the total time and the peak of Python
+memory allocated meanwhile (tracemalloc, which slows every case alike).
+"in memory" is what the unpaginated list did: every row as a dict, then
+one JSON document.
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import make_transactions, make_user, test_database
+from benchmarks.fastapi_latency import serve
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.test import Client
+import httpx
+
+from transactions import projections
+from transactions.models import Transaction
+
+
+def in_memory(user, session):
+    rows = list(projections.transaction_values(Transaction.objects.filter(user=user)))
+    yield projections.dumps(rows)
+
+
+def django_stream(kind):
+    def run(user, session):
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': f'/api/transactions/export/{kind}/', 'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'HTTP_COOKIE': session,
+            'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+        }
+        response = WSGIHandler()(environ, lambda status, headers: None)
+        try:
+            yield from response
+        finally:
+            response.close()
+    return run
+
+
+def fastapi_stream(kind, base_url):
+    def run(user, session):
+        with httpx.stream('GET', f'{base_url}/transactions/export/{kind}', auth=('bench', 'bench'),
+                          timeout=None) as response:
+            response.raise_for_status()
+            yield from response.iter_raw()
+    return run
+
+
+def measure(label, blocks):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    size = 0
+    for block in blocks:
+        if first is None:
+            first = time.perf_counter() - start
+        size += len(block)
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f'{label:<24} first byte {first * 1000:9.1f} ms  total {total * 1000:9.1f} ms'
+          f'  peak {peak / 2**20:7.1f} MiB  body {size / 2**20:7.1f} MiB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    with tempfile.TemporaryDirectory() as tmp:
+        if connection.vendor == 'sqlite':
+            # The FastAPI export thread needs a database file it can open
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tmp, 'bench.sqlite3')
+        with test_database():
+            user = make_user('bench')
+            make_transactions(user, args.rows)
+            client = Client()
+            client.force_login(user)
+            session = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+            # A real server: the ASGI test client buffers the whole body before returning
+            server, base_url = serve()
+            try:
+                for label, run in [('in memory (JSON)', in_memory),
+                                   ('Django CSV stream', django_stream('csv')),
+                                   ('Django NDJSON stream', django_stream('ndjson')),
+                                   ('FastAPI CSV stream', fastapi_stream('csv', base_url))]:
+                    measure(label, run(user, session))
+            finally:
+                server.should_exit = True
+
+
+if __name__ == '__main__':
+    main()
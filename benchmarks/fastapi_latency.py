@@ -0,0 +1,143 @@
+"""
+FastAPI probe latency while CSV imports run concurrently.
+
+Usage:
+    python -m benchmarks.fastapi_latency [--imports 4] [--rows 5000] [--seconds 10]
+    python -m benchmarks.fastapi_latency --blocking   # ORM calls on the event loop, as before
+
+The app is served by uvicorn on a thread of this process (one event loop,
+as a single worker) so it shares the test database. /health and
+/transactions/ are probed back to back, first idle and then while
+``--imports`` clients keep uploading CSV files; p50/p99 of both phases and
+the number of finished imports are reported.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import socket
+import tempfile
+import threading
+import time
+
+from benchmarks.common import make_transactions, make_user, test_database
+
+import django
+from django.conf import settings
+from django.db import connection
+
+import fastapi_app
+import httpx
+import uvicorn
+
+COLUMNS = {'date_column': 'date', 'description_column': 'description', 'amount_column': 'amount'}
+AUTH = ('bench', 'bench')
+
+
+def make_csv(rows, seed):
+    rng = random.Random(seed)
+    lines = ['date,description,amount']
+    for i in range(rows):
+        lines.append(f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d},Purchase {seed}-{i},{rng.randint(100, 90000) / 100}')
+    return '\n'.join(lines).encode()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def probe(client, seconds):
+    latencies = {'/health': [], '/transactions/': []}
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for path in latencies:
+            start = time.perf_counter()
+            response = await client.get(path, auth=AUTH)
+            response.raise_for_status()
+            latencies[path].append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def keep_importing(client, rows, seed, stop):
+    finished = 0
+    while not stop.is_set():
+        seed += 1000
+        response = await client.post(
+            '/import/csv/', data=COLUMNS, files={'file': ('bench.csv', make_csv(rows, seed))}, auth=AUTH
+        )
+        if response.is_error:
+            raise RuntimeError(f'Import failed with {response.status_code}: {response.text}')
+        finished += 1
+    return finished
+
+
+def report(label, latencies):
+    for path, values in latencies.items():
+        print(f'{label:<12} {path:<16} n={len(values):<6} p50 {statistics.median(values):8.2f} ms'
+              f'  p99 {percentile(values, 99):8.2f} ms  max {max(values):8.2f} ms')
+
+
+def serve():
+    """Start the app on a free local port; returns the server and its base URL"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(fastapi_app.app, host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f'http://127.0.0.1:{port}'
+
+
+async def run(args, base_url):
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        report('idle', await probe(client, args.seconds))
+
+        stop = asyncio.Event()
+        importers = [asyncio.create_task(keep_importing(client, args.rows, seed, stop)) for seed in range(args.imports)]
+        await asyncio.sleep(0.5)  # Let the imports get going
+        loaded = await probe(client, args.seconds)
+        stop.set()
+        finished = sum(await asyncio.gather(*importers))
+        report('importing', loaded)
+        print(f'{finished} imports of {args.rows} rows finished')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--imports', type=int, default=4, help='Concurrent import clients')
+    parser.add_argument('--rows', type=int, default=5000, help='Rows per imported CSV')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--blocking', action='store_true', help='Run ORM calls on the event loop')
+    args = parser.parse_args()
+
+    # Authentication cost is not what is measured here
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    if args.blocking:
+        os.environ['DJANGO_ALLOW_ASYNC_UNSAFE'] = 'true'
+
+        async def run_inline(func, *func_args, **kwargs):
+            return func(*func_args, **kwargs)
+        fastapi_app.run_db = run_inline
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if connection.vendor == 'sqlite':
+            # Pool threads need a database file they can all open, and concurrent
+            # importers must queue on SQLite's writer lock rather than fail to upgrade to it
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tmp, 'bench.sqlite3')
+            connection.settings_dict['OPTIONS'].setdefault('timeout', 60)
+            if django.VERSION >= (5, 1):
+                connection.settings_dict['OPTIONS'].setdefault('transaction_mode', 'IMMEDIATE')
+        with test_database():
+            make_transactions(make_user('bench'), 20000)
+            server, base_url = serve()
+            try:
+                asyncio.run(run(args, base_url))
+            finally:
+                server.should_exit = True
+
+
+if __name__ == '__main__':
+    main()
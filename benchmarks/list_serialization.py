@@ -0,0 +1,88 @@
+"""
+Serializing a large page of transactions: model instances through
+TransactionSerializer / pydantic versus values() projections encoded by
+orjson.
+
+Usage:
+    python -m benchmarks.list_serialization [--rows 10000] [--repeat 5]
+
+Each timing covers the query and the JSON encoding of ``--rows`` rows.
+"""
+import argparse
+import json
+
+from benchmarks.common import make_transactions, make_user, test_database, timed
+
+from django.db import connection
+from rest_framework.renderers import JSONRenderer
+
+import fastapi_app
+from transactions import projections
+from transactions.models import Transaction
+from transactions.serializers import TransactionSerializer
+
+
+def drf_serializer(transactions):
+    return JSONRenderer().render(TransactionSerializer(transactions, many=True).data)
+
+
+def drf_projection(transactions):
+    return projections.dumps(list(projections.transaction_values(transactions)))
+
+
+def fastapi_models(transactions):
+    # What get_transactions did before: one pydantic model per row, category read off the instance
+    page = fastapi_app.TransactionPage(results=[
+        fastapi_app.TransactionResponse(
+            id=t.id, date=t.date, description=t.description, amount=float(t.amount),
+            category_id=t.category.id if t.category else None,
+            category_name=t.category.name if t.category else None,
+        )
+        for t in transactions
+    ])
+    return page.model_dump_json().encode()
+
+
+def fastapi_projection(transactions):
+    rows = projections.api_transaction_rows(projections.api_transaction_values(transactions))
+    return projections.dumps({'results': rows, 'next_cursor': None, 'previous_cursor': None})
+
+
+def count_queries(encode, transactions):
+    executed = []
+
+    def counter(execute, sql, params, many, context):
+        executed.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(counter):
+        body = encode(transactions)
+    return body, len(executed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with test_database():
+        user = make_user()
+        make_transactions(user, args.rows)
+        transactions = Transaction.objects.filter(user=user).order_by('-date', '-created_at', '-id')
+
+        for label, encode in [
+            ('DRF TransactionSerializer', drf_serializer),
+            ('DRF values() + orjson', drf_projection),
+            ('FastAPI pydantic per row', fastapi_models),
+            ('FastAPI values() + orjson', fastapi_projection),
+        ]:
+            body, queries = count_queries(encode, transactions.all())
+            assert len(json.loads(body)['results'] if body.startswith(b'{') else json.loads(body)) == args.rows
+            with timed(f'{label} (x{args.repeat}, {queries} queries each)'):
+                for _ in range(args.repeat):
+                    encode(transactions.all())
+
+
+if __name__ == '__main__':
+    main()
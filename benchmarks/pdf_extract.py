@@ -0,0 +1,59 @@
+"""
+Serial versus process-pool PDF page extraction.
+
+Usage:
+    python -m benchmarks.pdf_extract [--pages 60] [--workers 1 2 4 8]
+
+Extracts the text of a generated multi-page statement with pools of each
+size and checks every run returns the serial output, in the same order.
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.common import statement_pdf
+
+from transactions import statements
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=60)
+    parser.add_argument('--lines', type=int, default=45, help='Transactions per page')
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, 2, 4, cpus}))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    content = statement_pdf(args.pages, args.lines)
+    print(f'pages: {args.pages}, lines/page: {args.lines}, cpus: {cpus}')
+
+    serial_time, serial = best_of(lambda: statements.extract_page_texts(content, workers=1), args.repeat)
+    print(f'serial      {serial_time:8.3f} s')
+
+    for workers in args.workers:
+        if workers <= 1:
+            continue
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            # Warm the workers so process start-up is not part of the timing
+            statements.extract_page_texts(content, pool=pool, workers=workers)
+            elapsed, texts = best_of(
+                lambda: statements.extract_page_texts(content, pool=pool, workers=workers), args.repeat
+            )
+        assert texts == serial, 'parallel extraction changed the output'
+        print(f'{workers:2d} workers  {elapsed:8.3f} s  speedup {serial_time / elapsed:5.2f}x')
+
+
+if __name__ == '__main__':
+    main()
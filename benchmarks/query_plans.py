@@ -0,0 +1,99 @@
+"""
+Query plans and timings for the hot Transaction query shapes, with and
+without the composite indexes from migration 0003.
+
+Usage:
+    python -m benchmarks.query_plans [--rows 200000]
+
+Runs on whatever backend DATABASES points at, so set DB_NAME (and friends)
+to compare PostgreSQL against the default SQLite.
+"""
+import argparse
+from datetime import date, timedelta
+
+from benchmarks.common import make_transactions, make_user, test_database, timed
+
+from django.db import connection
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth
+
+from transactions.models import Transaction
+
+INDEX_NAMES = ('transaction_user_date_idx', 'transaction_user_date_amt_idx')
+
+
+def query_shapes(user):
+    today = date.today()
+    month_start = today.replace(day=1)
+    transactions = Transaction.objects.filter(user=user)
+    return {
+        'transaction_list first page': transactions.order_by('-date', '-created_at')[:20],
+        'transaction_list date window': transactions.filter(
+            date__gte=today - timedelta(days=90), date__lte=today
+        ).order_by('-date', '-created_at')[:20],
+        'month totals by sign': transactions.filter(
+            date__gte=month_start, date__lte=today
+        ).values('user').annotate(
+            income=Sum('amount', filter=Q(amount__lt=0)),
+            expenses=Sum('amount', filter=Q(amount__gt=0)),
+        ),
+        'month category breakdown': transactions.filter(
+            date__gte=month_start, date__lte=today, amount__gt=0
+        ).values('category').annotate(total=Sum('amount')),
+        'rollup rebuild for user': transactions.order_by().annotate(
+            month=TruncMonth('date')
+        ).values('month', 'category').annotate(total=Sum('amount')),
+    }
+
+
+def run(user, repeat):
+    results = {}
+    for label, queryset in query_shapes(user).items():
+        print(f'\n-- {label}')
+        print(queryset.explain())
+        with timed(f'{label} (x{repeat})', results):
+            for _ in range(repeat):
+                list(queryset.all())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with test_database():
+        print(f'Backend: {connection.vendor}, rows: {args.rows}')
+        user = make_user()
+        make_transactions(make_user('noise'), args.rows)
+        make_transactions(user, args.rows)
+
+        indexes = [index for index in Transaction._meta.indexes if index.name in INDEX_NAMES]
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.remove_index(Transaction, index)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE transactions_transaction')
+
+        print('\n==== BEFORE (foreign key indexes only) ====')
+        before = run(user, args.repeat)
+
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.add_index(Transaction, index)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE transactions_transaction')
+
+        print('\n==== AFTER (composite and covering indexes) ====')
+        after = run(user, args.repeat)
+
+        print('\n==== Speedup ====')
+        for label in before:
+            print(f'{label:<50} {before[label] / after[label]:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Per-line regex rebuilding versus compiled statement profiles.
+
+Usage:
+    python -m benchmarks.statement_lines [--lines 200000]
+
+Parses a synthetic statement text (one transaction per line plus some
+headers and noise) with the loop FastAPI's import_pdf used and with the
+detected StatementProfile, and checks both find the same transactions.
+"""
+import argparse
+import random
+import re
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import DESCRIPTIONS
+
+from transactions import statements
+
+
+def make_lines(count, seed=42):
+    rng = random.Random(seed)
+    start = date(2015, 1, 1)
+    lines = ['ACCOUNT STATEMENT', 'Date Description Amount']
+    for i in range(count):
+        if i % 50 == 0:
+            lines.append(f'Page {i // 50 + 1}')
+        day = start + timedelta(days=rng.randrange(3650))
+        amount = rng.randint(-90000, 900000) / 100
+        lines.append(f'{day.isoformat()} {rng.choice(DESCRIPTIONS)} {amount:.2f}')
+    return lines
+
+
+def legacy_parse(lines):
+    """The per-line loop FastAPI's import_pdf used before statement profiles"""
+    rows = []
+    for line in lines:
+        date_patterns = [
+            r'(\d{4}-\d{2}-\d{2})',
+            r'(\d{2}/\d{2}/\d{4})',
+            r'(\d{2}-\w{3}-\d{4})',
+        ]
+        amount_patterns = [
+            r'\$?(-?\d+\.?\d{0,2})',
+            r'(-?\d+\.?\d{0,2})\s*\$?',
+        ]
+        for date_pattern in date_patterns:
+            date_match = re.search(date_pattern, line)
+            if date_match:
+                date_str = date_match.group(1)
+                try:
+                    if '-' in date_str and len(date_str.split('-')[0]) == 4:
+                        parsed_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+                    elif '/' in date_str:
+                        parsed_date = datetime.strptime(date_str, '%m/%d/%Y').date()
+                    elif '-' in date_str and len(date_str.split('-')[2]) == 4:
+                        parsed_date = datetime.strptime(date_str, '%d-%b-%Y').date()
+                    else:
+                        continue
+                    remaining = re.sub(date_pattern, '', line).strip()
+                    amount = None
+                    for amount_pattern in amount_patterns:
+                        amount_match = re.search(amount_pattern, remaining)
+                        if amount_match:
+                            try:
+                                amount = float(amount_match.group(1))
+                                remaining = re.sub(amount_pattern, '', remaining).strip()
+                                break
+                            except ValueError:
+                                continue
+                    if amount is not None and remaining.strip():
+                        rows.append((parsed_date, remaining.strip(), amount))
+                except ValueError:
+                    continue
+                break
+    return rows
+
+
+def profile_parse(lines):
+    profile = statements.detect_profile(['\n'.join(lines[:100])])
+    return [(row['date'], row['description'], row['amount']) for row in profile.parse_lines(lines)]
+
+
+def best_of(func, lines, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(lines)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    lines = make_lines(args.lines)
+    legacy_time, legacy_rows = best_of(legacy_parse, lines, args.repeat)
+    profile_time, profile_rows = best_of(profile_parse, lines, args.repeat)
+    assert [row[0] for row in legacy_rows] == [row[0] for row in profile_rows]
+
+    print(f'lines: {len(lines)}, transactions: {len(profile_rows)}')
+    print(f'per-line patterns  {legacy_time:8.3f} s  {len(lines) / legacy_time:12.0f} lines/s')
+    print(f'compiled profile   {profile_time:8.3f} s  {len(lines) / profile_time:12.0f} lines/s')
+    print(f'speedup            {legacy_time / profile_time:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,37 @@
+from datetime import date
 from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from transactions.models import Category, Transaction
 
-# Create your tests here.
+class DashboardChartDataTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.login(username='testuser', password='testpass')
+        food = Category.objects.create(name="Food")
+        Transaction.objects.create(user=self.user, date=date(2024, 3, 5), description="Lunch", category=food, amount=30)
+        Transaction.objects.create(user=self.user, date=date(2024, 2, 6), description="Salary", amount=-100)
+
+    def test_page_leaves_charts_to_the_browser(self):
+        response = self.client.get('/', {'month': 3, 'year': 2024})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'id="category-chart"')
+        self.assertContains(response, '/dashboard/chart-data/?month=3&amp;year=2024')
+        self.assertNotContains(response, 'plotly-graph-div')
+
+    def test_chart_data_series(self):
+        response = self.client.get('/dashboard/chart-data/', {'month': 3, 'year': 2024})
+        self.assertEqual(response.json(), {
+            'categories': {'names': ['Food'], 'totals': [30.0]},
+            'trends': {'months': ['2024-02-01', '2024-03-01'], 'income': [100.0, 0.0], 'expenses': [0.0, 30.0]},
+        })
+
+        response = self.client.get('/dashboard/chart-data/', {'month': 3, 'year': 2024},
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_invalid_period_falls_back_to_this_month(self):
+        for params in [{'month': 'abc', 'year': 2024}, {'month': 13, 'year': 2024}]:
+            self.assertEqual(self.client.get('/dashboard/chart-data/', params).status_code, 200)
+            self.assertEqual(self.client.get('/', params).status_code, 200)
@@ -4,4 +4,5 @@ from . import views
 urlpatterns = [
     path('', views.dashboard, name='dashboard'),
     path('dashboard/', views.dashboard, name='budget_dashboard'),
+    path('dashboard/chart-data/', views.chart_data, name='dashboard_chart_data'),
 ]
\ No newline at end of file
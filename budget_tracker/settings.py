@@ -11,7 +11,9 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 import os
+import django
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -98,6 +100,18 @@ if not os.environ.get('DB_NAME'):
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 
+# Cache
+# Read endpoints cache their responses here. The default is per-process
+# memory; set REDIS_URL to share the cache between processes
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -164,6 +178,33 @@ if os.environ.get('VERCEL'):
     ALLOWED_HOSTS = ['*']
     DATABASES['default'] = dj_database_url.config(default='sqlite:///db.sqlite3')
 
+# Database connection reuse
+# Connections are kept for CONN_MAX_AGE seconds instead of being reopened on
+# every request, and health-checked before reuse so one the server dropped is
+# replaced rather than failing the request. A serverless instance keeps its
+# connection briefly, as it cannot close it while frozen between invocations.
+# The FastAPI process keeps one per database thread (FASTAPI_DB_THREADS).
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60 if os.environ.get('VERCEL') else 600))
+DATABASES['default']['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Set DB_TRANSACTION_POOLER when the database is reached through PgBouncer
+# (or a hosted pooler) in transaction mode, which cannot hold server-side cursors
+if os.environ.get('DB_TRANSACTION_POOLER'):
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# DB_POOL uses psycopg's built-in pool instead (Django 5.1+ with psycopg 3).
+# Pooled connections are returned after each request, so CONN_MAX_AGE is off
+if os.environ.get('DB_POOL') and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    if django.VERSION < (5, 1):
+        raise ImproperlyConfigured('DB_POOL requires Django 5.1 or later with psycopg 3')
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    }
+
 # Crispy Forms
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
@@ -2,14 +2,21 @@
 FastAPI integration for the Budget Tracker
 This provides additional API endpoints alongside Django REST Framework
 """
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form, Query, Request, Response
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBasic, HTTPBasicCredentials, HTTPBearer
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, condecimal
+from typing import List, Literal, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import date
+import asyncio
+import datetime
+import functools
 import secrets
 import os
+import threading
 import django
 from django.conf import settings
 
@@ -17,15 +24,23 @@ from django.conf import settings
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'budget_tracker.settings')
 django.setup()
 
-from transactions.models import Transaction, Category
+from transactions import batch, caching, categorization, columnar, exports, importers, jobs, projections, rollups, search, tokens
+from transactions.models import ImportJob, Transaction, Category
+from transactions.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, paginate
 from django.contrib.auth.models import User
-from django.db import transaction as db_transaction
+from django.db import close_old_connections, connections, transaction as db_transaction
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await close_db_connections()
 
 # FastAPI app
 app = FastAPI(
     title="Budget Tracker API",
     description="FastAPI endpoints for the Money-based Budget Tracker",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -37,8 +52,85 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Security
-security = HTTPBasic()
+# Security: a bearer token from /auth/token, or HTTP Basic
+security = HTTPBasic(auto_error=False)
+bearer_security = HTTPBearer(auto_error=False)
+
+# The Django ORM is synchronous, so every route hands its database work to a
+# bounded pool instead of running it on the event loop. Each pool thread keeps
+# its own connection, recycled per CONN_MAX_AGE like a Django request would,
+# until close_db_connections() releases them all when the app shuts down.
+DB_THREADS = getattr(settings, 'FASTAPI_DB_THREADS', 8)
+db_executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix='fastapi-db')
+
+def _call_with_connection(func, *args, **kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+async def run_db(func, *args, **kwargs):
+    """Run a synchronous ORM callable on the database pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, functools.partial(_call_with_connection, func, *args, **kwargs))
+
+def _finish_stream(iterator):
+    iterator.close()
+    connections.close_all()
+
+async def stream_db(make_iterator):
+    """
+    Drive a synchronous ORM iterator from an async response body.
+
+    The iterator runs on a thread of its own for its whole life: a streaming
+    query's cursor must stay on the connection, and so the thread, that opened
+    it, and a long export must not hold one of the shared pool threads.
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='fastapi-stream')
+    loop = asyncio.get_running_loop()
+    try:
+        iterator = await loop.run_in_executor(executor, make_iterator)
+        try:
+            while (block := await loop.run_in_executor(executor, next, iterator, None)) is not None:
+                yield block
+        finally:
+            await loop.run_in_executor(executor, _finish_stream, iterator)
+    finally:
+        executor.shutdown(wait=False)
+
+def _close_thread_connections(barrier):
+    # Hold every pool thread until all have a call, so each closes its own connection
+    try:
+        barrier.wait()
+    except threading.BrokenBarrierError:
+        pass
+    connections.close_all()
+
+async def close_db_connections():
+    """Close the connections the database threads keep between calls, e.g. on shutdown"""
+    barrier = threading.Barrier(DB_THREADS, timeout=5)
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(
+        loop.run_in_executor(db_executor, _close_thread_connections, barrier) for _ in range(DB_THREADS)
+    ))
+
+async def versioned_response(request: Request, user, build):
+    """
+    Answer a read from the user's data version: 304 when the client's ETag is
+    current, otherwise the cached body or ``build()``'s JSON bytes.
+    """
+    def respond():
+        etag = caching.etag(user.pk)
+        if caching.matches(request.headers.get("if-none-match"), etag):
+            return None, etag
+        return caching.cached_body(str(request.url), etag, build), etag
+
+    body, etag = await run_db(respond)
+    headers = {"ETag": etag, "Cache-Control": caching.CACHE_CONTROL, "Vary": "Authorization"}
+    if body is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 # Pydantic models
 class TransactionBase(BaseModel):
@@ -47,8 +139,12 @@ class TransactionBase(BaseModel):
     amount: float
     category_id: Optional[int] = None
 
+# The Transaction.amount limits, so oversized values get a 422 rather than a database error
+Amount = condecimal(max_digits=10, decimal_places=2)
+
 class TransactionCreate(TransactionBase):
-    pass
+    description: str = Field(max_length=255)
+    amount: Amount
 
 class TransactionResponse(TransactionBase):
     id: int
@@ -57,6 +153,32 @@ class TransactionResponse(TransactionBase):
     class Config:
         from_attributes = True
 
+class TransactionUpdate(BaseModel):
+    # Partial: only the fields sent are changed
+    id: int
+    date: Optional[datetime.date] = None
+    description: Optional[str] = Field(None, max_length=255)
+    amount: Optional[Amount] = None
+    category_id: Optional[int] = None
+
+class TransactionBatch(BaseModel):
+    create: List[TransactionCreate] = []
+    update: List[TransactionUpdate] = []
+    delete: List[int] = []
+
+class TransactionBatchResponse(BaseModel):
+    created: List[TransactionResponse]
+    updated: List[TransactionResponse]
+    deleted: List[int]
+
+class TransactionPage(BaseModel):
+    results: List[TransactionResponse]
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+
+class TransactionSearchResponse(BaseModel):
+    results: List[TransactionResponse]
+
 class CategoryBase(BaseModel):
     name: str
 
@@ -75,24 +197,65 @@ class SummaryResponse(BaseModel):
     net_amount: float
     category_summary: List[dict]
 
+class ImportJobResponse(BaseModel):
+    id: int
+    status: str
+    file_name: str
+    total_rows: Optional[int] = None
+    processed_rows: int
+    imported: int
+    skipped_duplicates: int
+    error: str
+
+    class Config:
+        from_attributes = True
+
+class TokenResponse(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
 # Authentication dependency
-def authenticate_user(credentials: HTTPBasicCredentials = Depends(security)):
-    """Authenticate user with HTTP Basic Auth"""
+def _check_credentials(username, password):
     try:
-        user = User.objects.get(username=credentials.username)
-        if not user.check_password(credentials.password):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid credentials",
-                headers={"WWW-Authenticate": "Basic"},
-            )
-        return user
+        user = User.objects.get(username=username)
     except User.DoesNotExist:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid credentials",
-            headers={"WWW-Authenticate": "Basic"},
-        )
+        return None
+    return user if user.check_password(password) else None
+
+def _unauthorized(detail="Invalid credentials"):
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Basic"},
+    )
+
+async def authenticate_basic(credentials: Optional[HTTPBasicCredentials] = Depends(security)):
+    """Authenticate user with HTTP Basic Auth"""
+    if credentials is None:
+        raise _unauthorized("Not authenticated")
+    user = tokens.cached_user(credentials.username, credentials.password)
+    if user is not None:
+        return user
+    # Password hashing is deliberately slow, keep it off the event loop too
+    user = await run_db(_check_credentials, credentials.username, credentials.password)
+    if user is None:
+        raise _unauthorized()
+    tokens.remember_credentials(credentials.username, credentials.password, user)
+    return user
+
+async def authenticate_user(
+    bearer: Optional[HTTPAuthorizationCredentials] = Depends(bearer_security),
+    credentials: Optional[HTTPBasicCredentials] = Depends(security),
+):
+    """Authenticate user with a bearer token, falling back to HTTP Basic Auth"""
+    if bearer is not None:
+        try:
+            # May read the user's current token stamp, see transactions.tokens
+            return await run_db(tokens.verify_token, bearer.credentials)
+        except tokens.InvalidToken:
+            raise _unauthorized("Invalid, expired or revoked token")
+    return await authenticate_basic(credentials)
 
 # API Routes
 @app.get("/health")
@@ -100,25 +263,40 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "budget-tracker-fastapi"}
 
-@app.get("/transactions/", response_model=List[TransactionResponse])
+@app.post("/auth/token", response_model=TokenResponse)
+async def create_token(user: User = Depends(authenticate_basic)):
+    """Exchange Basic credentials for a bearer token"""
+    try:
+        token = await run_db(tokens.issue_token, user)
+    except tokens.InvalidToken as e:
+        raise _unauthorized(str(e))
+    return TokenResponse(access_token=token, expires_in=tokens.TOKEN_MAX_AGE)
+
+@app.get("/transactions/", response_model=TransactionPage)
 async def get_transactions(
+    request: Request,
     user: User = Depends(authenticate_user),
-    skip: int = 0,
-    limit: int = 100
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    search_text: Optional[str] = Query(None, alias="search")
 ):
-    """Get user's transactions"""
-    transactions = Transaction.objects.filter(user=user).order_by('-date')[skip:skip+limit]
-    return [
-        TransactionResponse(
-            id=t.id,
-            date=t.date,
-            description=t.description,
-            amount=float(t.amount),
-            category_id=t.category.id if t.category else None,
-            category_name=t.category.name if t.category else None
-        )
-        for t in transactions
-    ]
+    """Get user's transactions, newest first, one cursor page at a time"""
+    def build():
+        queryset = search.matching(Transaction.objects.filter(user=user), search_text)
+        queryset = projections.api_transaction_values(queryset)
+        try:
+            page = paginate(queryset, cursor=cursor, limit=limit)
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        # Already shaped like TransactionPage, so skip the per-row pydantic models
+        return projections.dumps({
+            "results": projections.api_transaction_rows(page.items),
+            "next_cursor": page.next_cursor,
+            "previous_cursor": page.previous_cursor,
+        })
+
+    return await versioned_response(request, user, build)
 
 @app.post("/transactions/", response_model=TransactionResponse)
 async def create_transaction(
@@ -126,33 +304,94 @@ async def create_transaction(
     user: User = Depends(authenticate_user)
 ):
     """Create a new transaction"""
-    # Auto-categorize if no category provided
-    category = None
-    if transaction.category_id:
+    def create():
+        # Auto-categorize if no category provided
+        category_id = transaction.category_id
+        if category_id:
+            if not Category.objects.filter(id=category_id).exists():
+                raise HTTPException(status_code=404, detail="Category not found")
+        else:
+            # Auto-categorize based on description
+            category_id = categorization.categorize(transaction.description, user=user)
+
+        db_trans = Transaction.objects.create(
+            user=user,
+            date=transaction.date,
+            description=transaction.description,
+            amount=transaction.amount,
+            category_id=category_id
+        )
+
+        return TransactionResponse(
+            id=db_trans.id,
+            date=db_trans.date,
+            description=db_trans.description,
+            amount=float(db_trans.amount),
+            category_id=db_trans.category.id if db_trans.category else None,
+            category_name=db_trans.category.name if db_trans.category else None
+        )
+
+    return await run_db(create)
+
+@app.post("/transactions/batch/", response_model=TransactionBatchResponse)
+async def batch_transactions(
+    changes: TransactionBatch,
+    user: User = Depends(authenticate_user)
+):
+    """Create, update and delete many transactions in one request; all or nothing"""
+    def apply():
         try:
-            category = Category.objects.get(id=transaction.category_id)
-        except Category.DoesNotExist:
-            raise HTTPException(status_code=404, detail="Category not found")
-    else:
-        # Auto-categorize based on description
-        category = auto_categorize(transaction.description)
-
-    db_trans = Transaction.objects.create(
-        user=user,
-        date=transaction.date,
-        description=transaction.description,
-        amount=transaction.amount,
-        category=category
+            result = batch.apply(
+                user,
+                creates=[item.model_dump() for item in changes.create],
+                updates=[item.model_dump(exclude_unset=True) for item in changes.update],
+                deletes=changes.delete,
+            )
+        except batch.BatchError as e:
+            raise HTTPException(status_code=400, detail=e.errors)
+
+        rows = projections.api_transaction_rows(projections.api_transaction_values(
+            Transaction.objects.filter(pk__in=result.created + result.updated)
+        ))
+        return projections.dumps({
+            "created": batch.in_order(rows, result.created),
+            "updated": batch.in_order(rows, result.updated),
+            "deleted": result.deleted,
+        })
+
+    return Response(content=await run_db(apply), media_type="application/json")
+
+@app.get("/transactions/export/{kind}")
+async def export_transactions(
+    kind: Literal["csv", "ndjson", "parquet"],
+    user: User = Depends(authenticate_user)
+):
+    """Stream the user's whole history as CSV, NDJSON or Parquet, at constant memory"""
+    reason = exports.unavailable(kind)
+    if reason:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=reason)
+    return StreamingResponse(
+        stream_db(lambda: exports.stream(user, kind)),
+        media_type=exports.CONTENT_TYPES[kind],
+        headers={"Content-Disposition": f'attachment; filename="{exports.filename(kind)}"'},
     )
 
-    return TransactionResponse(
-        id=db_trans.id,
-        date=db_trans.date,
-        description=db_trans.description,
-        amount=float(db_trans.amount),
-        category_id=db_trans.category.id if db_trans.category else None,
-        category_name=db_trans.category.name if db_trans.category else None
-    )
+@app.get("/transactions/search", response_model=TransactionSearchResponse)
+async def search_transactions(
+    request: Request,
+    q: str,
+    user: User = Depends(authenticate_user),
+    limit: int = Query(search.SEARCH_LIMIT, ge=1, le=search.MAX_SEARCH_LIMIT)
+):
+    """The transactions whose descriptions best match ``q``, best first"""
+    def build():
+        ids = search.ranked_ids(Transaction.objects.filter(user=user), q, limit)
+        rows = projections.api_transaction_rows(projections.api_transaction_values(
+            Transaction.objects.filter(pk__in=ids)
+        ))
+        return projections.dumps({"results": batch.in_order(rows, ids)})
+
+    return await versioned_response(request, user, build)
 
 @app.get("/transactions/{transaction_id}", response_model=TransactionResponse)
 async def get_transaction(
@@ -160,18 +399,21 @@ async def get_transaction(
     user: User = Depends(authenticate_user)
 ):
     """Get a specific transaction"""
-    try:
-        trans = Transaction.objects.get(id=transaction_id, user=user)
-        return TransactionResponse(
-            id=trans.id,
-            date=trans.date,
-            description=trans.description,
-            amount=float(trans.amount),
-            category_id=trans.category.id if trans.category else None,
-            category_name=trans.category.name if trans.category else None
-        )
-    except Transaction.DoesNotExist:
-        raise HTTPException(status_code=404, detail="Transaction not found")
+    def load():
+        try:
+            trans = Transaction.objects.get(id=transaction_id, user=user)
+            return TransactionResponse(
+                id=trans.id,
+                date=trans.date,
+                description=trans.description,
+                amount=float(trans.amount),
+                category_id=trans.category.id if trans.category else None,
+                category_name=trans.category.name if trans.category else None
+            )
+        except Transaction.DoesNotExist:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+
+    return await run_db(load)
 
 @app.put("/transactions/{transaction_id}", response_model=TransactionResponse)
 async def update_transaction(
@@ -180,32 +422,35 @@ async def update_transaction(
     user: User = Depends(authenticate_user)
 ):
     """Update a transaction"""
-    try:
-        db_trans = Transaction.objects.get(id=transaction_id, user=user)
-
-        category = None
-        if transaction.category_id:
-            try:
-                category = Category.objects.get(id=transaction.category_id)
-            except Category.DoesNotExist:
-                raise HTTPException(status_code=404, detail="Category not found")
-
-        db_trans.date = transaction.date
-        db_trans.description = transaction.description
-        db_trans.amount = transaction.amount
-        db_trans.category = category
-        db_trans.save()
+    def update():
+        try:
+            db_trans = Transaction.objects.get(id=transaction_id, user=user)
+
+            category = None
+            if transaction.category_id:
+                try:
+                    category = Category.objects.get(id=transaction.category_id)
+                except Category.DoesNotExist:
+                    raise HTTPException(status_code=404, detail="Category not found")
+
+            db_trans.date = transaction.date
+            db_trans.description = transaction.description
+            db_trans.amount = transaction.amount
+            db_trans.category = category
+            db_trans.save()
+
+            return TransactionResponse(
+                id=db_trans.id,
+                date=db_trans.date,
+                description=db_trans.description,
+                amount=float(db_trans.amount),
+                category_id=db_trans.category.id if db_trans.category else None,
+                category_name=db_trans.category.name if db_trans.category else None
+            )
+        except Transaction.DoesNotExist:
+            raise HTTPException(status_code=404, detail="Transaction not found")
 
-        return TransactionResponse(
-            id=db_trans.id,
-            date=db_trans.date,
-            description=db_trans.description,
-            amount=float(db_trans.amount),
-            category_id=db_trans.category.id if db_trans.category else None,
-            category_name=db_trans.category.name if db_trans.category else None
-        )
-    except Transaction.DoesNotExist:
-        raise HTTPException(status_code=404, detail="Transaction not found")
+    return await run_db(update)
 
 @app.delete("/transactions/{transaction_id}")
 async def delete_transaction(
@@ -213,50 +458,57 @@ async def delete_transaction(
     user: User = Depends(authenticate_user)
 ):
     """Delete a transaction"""
-    try:
-        trans = Transaction.objects.get(id=transaction_id, user=user)
-        trans.delete()
-        return {"message": "Transaction deleted successfully"}
-    except Transaction.DoesNotExist:
-        raise HTTPException(status_code=404, detail="Transaction not found")
+    def delete():
+        try:
+            trans = Transaction.objects.get(id=transaction_id, user=user)
+            trans.delete()
+            return {"message": "Transaction deleted successfully"}
+        except Transaction.DoesNotExist:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+
+    return await run_db(delete)
 
 @app.get("/categories/", response_model=List[CategoryResponse])
 async def get_categories():
     """Get all categories"""
-    categories = Category.objects.all()
-    return [CategoryResponse(id=c.id, name=c.name) for c in categories]
+    def load():
+        return [CategoryResponse(id=c.id, name=c.name) for c in Category.objects.all()]
+
+    return await run_db(load)
 
 @app.post("/categories/", response_model=CategoryResponse)
 async def create_category(category: CategoryCreate):
     """Create a new category"""
-    db_category = Category.objects.create(name=category.name)
+    db_category = await run_db(Category.objects.create, name=category.name)
     return CategoryResponse(id=db_category.id, name=db_category.name)
 
 @app.get("/summary/")
 async def get_summary(
+    request: Request,
     user: User = Depends(authenticate_user),
     month: Optional[int] = None,
     year: Optional[int] = None
 ):
     """Get financial summary"""
-    queryset = Transaction.objects.filter(user=user)
-
     if month and year:
-        queryset = queryset.filter(date__year=year, date__month=month)
+        try:
+            rollups.period_start(year, month)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-    total_income = queryset.filter(amount__lt=0).aggregate(total=Sum('amount'))['total'] or 0
-    total_expenses = queryset.filter(amount__gt=0).aggregate(total=Sum('amount'))['total'] or 0
+    def build():
+        totals = rollups.summary(user, year=year, month=month)
+        total_income = totals['total_income']
+        total_expenses = totals['total_expenses']
 
-    category_summary = queryset.filter(amount__gt=0).values('category__name').annotate(
-        total=Sum('amount')
-    ).order_by('-total')
+        return projections.dumps({
+            "total_income": abs(float(total_income)),
+            "total_expenses": float(total_expenses),
+            "net_amount": abs(float(total_income)) - float(total_expenses),
+            "category_summary": totals['category_summary']
+        }, decimal=float)
 
-    return SummaryResponse(
-        total_income=abs(float(total_income)),
-        total_expenses=float(total_expenses),
-        net_amount=abs(float(total_income)) - float(total_expenses),
-        category_summary=list(category_summary)
-    )
+    return await versioned_response(request, user, build)
 
 @app.post("/import/csv/")
 async def import_csv(
@@ -268,135 +520,60 @@ async def import_csv(
 ):
     """Import transactions from CSV"""
     try:
-        import pandas as pd
-        import io
-
-        df = pd.read_csv(io.StringIO((await file.read()).decode('utf-8')))
+        column_mapping = {
+            'date': date_column,
+            'description': description_column,
+            'amount': amount_column,
+        }
+        # Parse straight from the spooled upload instead of reading it into memory
+        result = await run_db(importers.import_csv, user, file.file, column_mapping)
+        return {
+            "message": f"Imported {result.imported} transactions",
+            "imported": result.imported,
+            "skipped_duplicates": result.skipped_duplicates,
+            "rejected": result.rejected,
+            "errors": result.errors
+        }
 
-        transactions = []
-        for _, row in df.iterrows():
-            transaction_data = {
-                'date': row[date_column],
-                'description': row[description_column],
-                'amount': float(row[amount_column]),
-                'user': user
-            }
-
-            # Auto-categorize
-            transaction_data['category'] = auto_categorize(transaction_data['description'])
-
-            transactions.append(Transaction(**transaction_data))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Import failed: {str(e)}")
 
-        Transaction.objects.bulk_create(transactions)
-        return {"message": f"Imported {len(transactions)} transactions"}
+@app.post("/import/parquet/")
+async def import_parquet(
+    file: UploadFile = File(...),
+    user: User = Depends(authenticate_user)
+):
+    """Import transactions from a Parquet file with date, description, amount and optional category columns"""
+    if not columnar.available():
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=columnar.UNAVAILABLE)
+    try:
+        result = await run_db(columnar.import_parquet, user, file.file)
+        return {
+            "message": f"Imported {result.imported} transactions",
+            "imported": result.imported,
+            "skipped_duplicates": result.skipped_duplicates,
+            "rejected": result.rejected,
+            "errors": result.errors
+        }
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Import failed: {str(e)}")
 
-@app.post("/import/pdf/")
+@app.post("/import/pdf/", response_model=ImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def import_pdf(
     file: UploadFile = File(...),
     user: User = Depends(authenticate_user)
 ):
-    """Import transactions from PDF"""
+    """Queue a PDF import; poll /import/jobs/{job_id} for its progress"""
+    return await run_db(jobs.enqueue, user, 'text', file.file, file_name=file.filename or '')
+
+@app.get("/import/jobs/{job_id}", response_model=ImportJobResponse)
+async def get_import_job(
+    job_id: int,
+    user: User = Depends(authenticate_user)
+):
+    """Status, progress and row counts of an import job"""
     try:
-        import pdfplumber
-        import re
-        from datetime import datetime
-        import io
-
-        content = await file.read()
-        transactions = []
-
-        with pdfplumber.open(io.BytesIO(content)) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    lines = text.split('\n')
-                    for line in lines:
-                        # Parse transactions (same logic as Django view)
-                        date_patterns = [
-                            r'(\d{4}-\d{2}-\d{2})',
-                            r'(\d{2}/\d{2}/\d{4})',
-                            r'(\d{2}-\w{3}-\d{4})',
-                        ]
-
-                        amount_patterns = [
-                            r'\$?(-?\d+\.?\d{0,2})',
-                            r'(-?\d+\.?\d{0,2})\s*\$?',
-                        ]
-
-                        for date_pattern in date_patterns:
-                            date_match = re.search(date_pattern, line)
-                            if date_match:
-                                date_str = date_match.group(1)
-                                try:
-                                    if '-' in date_str and len(date_str.split('-')[0]) == 4:
-                                        parsed_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                                    elif '/' in date_str:
-                                        parsed_date = datetime.strptime(date_str, '%m/%d/%Y').date()
-                                    elif '-' in date_str and len(date_str.split('-')[2]) == 4:
-                                        parsed_date = datetime.strptime(date_str, '%d-%b-%Y').date()
-                                    else:
-                                        continue
-
-                                    remaining = re.sub(date_pattern, '', line).strip()
-
-                                    amount = None
-                                    for amount_pattern in amount_patterns:
-                                        amount_match = re.search(amount_pattern, remaining)
-                                        if amount_match:
-                                            amount_str = amount_match.group(1)
-                                            try:
-                                                amount = float(amount_str)
-                                                remaining = re.sub(amount_pattern, '', remaining).strip()
-                                                break
-                                            except ValueError:
-                                                continue
-
-                                    if amount is not None:
-                                        description = remaining.strip()
-                                        if description:
-                                            transaction_data = {
-                                                'date': parsed_date,
-                                                'description': description,
-                                                'amount': amount,
-                                                'user': user,
-                                                'category': auto_categorize(description)
-                                            }
-                                            transactions.append(Transaction(**transaction_data))
-                                except ValueError:
-                                    continue
-                                break
-
-        Transaction.objects.bulk_create(transactions)
-        return {"message": f"Imported {len(transactions)} transactions from PDF"}
-
-    except ImportError:
-        raise HTTPException(status_code=500, detail="PDF processing libraries not available")
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"PDF processing failed: {str(e)}")
-
-# Helper functions
-def auto_categorize(description: str) -> Optional[Category]:
-    """Auto-categorize transaction based on description"""
-    keywords = {
-        'food': ['restaurant', 'grocery', 'food', 'cafe', 'dinner'],
-        'transport': ['taxi', 'bus', 'train', 'gas', 'parking'],
-        'entertainment': ['movie', 'game', 'concert', 'party'],
-        'utilities': ['electricity', 'water', 'internet', 'phone'],
-        'shopping': ['clothes', 'shoes', 'amazon', 'store']
-    }
-
-    description_lower = description.lower()
-    for category_name, words in keywords.items():
-        if any(word in description_lower for word in words):
-            category, _ = Category.objects.get_or_create(name=category_name.capitalize())
-            return category
-
-    # Default category
-    category, _ = Category.objects.get_or_create(name='Other')
-    return category
-
-# Import Sum for aggregations
-from django.db.models import Sum
\ No newline at end of file
+        return await run_db(ImportJob.objects.defer("content").get, id=job_id, user=user)
+    except ImportJob.DoesNotExist:
+        raise HTTPException(status_code=404, detail="Import job not found")
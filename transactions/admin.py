@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import CategoryRule
+
+
+@admin.register(CategoryRule)
+class CategoryRuleAdmin(admin.ModelAdmin):
+    list_display = ('pattern', 'category', 'priority', 'user', 'is_active')
+    list_filter = ('is_active', 'category')
+    search_fields = ('pattern',)
@@ -0,0 +1,133 @@
+"""
+Batched transaction writes, shared by the DRF and FastAPI batch endpoints.
+
+A batch holds one user's creates, partial updates (by id) and deletes (by
+id). Field values are validated by the API layer; everything that needs the
+database (category ids, ownership of the updated and deleted ids) is checked
+here with one query each before anything is written, so a batch is applied
+entirely or not at all. The writes run in one DB transaction: new rows are
+categorized in one pass and inserted with bulk_create, updates go out with
+bulk_update, and the rollup deltas of all of them are applied once per
+bucket (see rollups.deferred).
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import categorization, rollups
+from .models import Category, Transaction
+
+MAX_BATCH_SIZE = getattr(settings, 'TRANSACTION_BATCH_MAX_SIZE', 1000)
+BATCH_SIZE = 500
+
+UPDATABLE_FIELDS = ('date', 'description', 'amount', 'category_id')
+REQUIRED_FIELDS = ('date', 'description', 'amount')
+
+
+class BatchError(Exception):
+    """
+    A batch that cannot be applied.
+
+    ``errors`` maps 'create', 'update' or 'delete' to {item index: [messages]},
+    or 'non_field_errors' to a list of messages about the whole batch.
+    """
+
+    def __init__(self, errors):
+        super().__init__('Invalid batch')
+        self.errors = errors
+
+
+class BatchResult:
+    def __init__(self, created, updated, deleted):
+        self.created = created  # ids, in request order
+        self.updated = updated
+        self.deleted = deleted
+
+
+def validate(user, creates, updates, deletes):
+    """Raise BatchError unless every item of the batch can be applied for ``user``"""
+    size = len(creates) + len(updates) + len(deletes)
+    if size > MAX_BATCH_SIZE:
+        raise BatchError({'non_field_errors': [f'A batch holds at most {MAX_BATCH_SIZE} items, got {size}']})
+
+    errors = {}
+
+    def fail(operation, index, message):
+        errors.setdefault(operation, {}).setdefault(index, []).append(message)
+
+    category_ids = {item['category_id'] for item in [*creates, *updates] if item.get('category_id') is not None}
+    known_categories = set(Category.objects.filter(pk__in=category_ids).values_list('pk', flat=True))
+    for operation, items in (('create', creates), ('update', updates)):
+        for index, item in enumerate(items):
+            for name in REQUIRED_FIELDS:
+                if (operation == 'create' or name in item) and item.get(name) is None:
+                    fail(operation, index, f'{name} may not be null')
+            category_id = item.get('category_id')
+            if category_id is not None and category_id not in known_categories:
+                fail(operation, index, f'Category {category_id} not found')
+
+    targets = [('update', index, item['id']) for index, item in enumerate(updates)]
+    targets += [('delete', index, pk) for index, pk in enumerate(deletes)]
+    owned = set(Transaction.objects.filter(user=user, pk__in={pk for _, _, pk in targets}).values_list('pk', flat=True))
+    seen = set()
+    for operation, index, pk in targets:
+        if pk not in owned:
+            fail(operation, index, f'Transaction {pk} not found')
+        elif pk in seen:
+            fail(operation, index, f'Transaction {pk} appears more than once in the batch')
+        seen.add(pk)
+
+    if errors:
+        raise BatchError(errors)
+
+
+def apply(user, creates=(), updates=(), deletes=()):
+    """
+    Validate and apply a batch for ``user`` in one DB transaction.
+
+    ``creates`` are dicts of 'date', 'description', 'amount' and optionally
+    'category_id' (auto-categorized when missing or None), ``updates`` dicts
+    with an 'id' and any of those fields, ``deletes`` transaction ids.
+    Raises BatchError, having written nothing, if any item is invalid.
+    """
+    creates, updates, deletes = list(creates), list(updates), list(deletes)
+    validate(user, creates, updates, deletes)
+
+    with transaction.atomic(), rollups.deferred():
+        new = [Transaction(user=user, **{name: item.get(name) for name in UPDATABLE_FIELDS}) for item in creates]
+        categorization.assign_categories(new, user=user)
+        Transaction.objects.bulk_create(new, batch_size=BATCH_SIZE)
+        _update(user, updates)
+        if deletes:
+            Transaction.objects.filter(user=user, pk__in=deletes).delete()
+
+    return BatchResult([t.pk for t in new], [item['id'] for item in updates], deletes)
+
+
+def _update(user, updates):
+    if not updates:
+        return
+    stored = Transaction.objects.filter(user=user).in_bulk([item['id'] for item in updates])
+    now = timezone.now()
+    changes = []
+    fields = {'updated_at'}  # bulk_update skips auto_now
+    for item in updates:
+        obj = stored[item['id']]
+        previous = rollups.row_of(obj)
+        for name in UPDATABLE_FIELDS:
+            if name in item:
+                setattr(obj, name, item[name])
+                fields.add(name)
+        obj.updated_at = now
+        changes.append((previous, obj))
+
+    # bulk_update bypasses the save signals that feed the rollups
+    Transaction.objects.bulk_update(stored.values(), sorted(fields), batch_size=BATCH_SIZE)
+    for previous, obj in changes:
+        rollups.record_change(previous, rollups.row_of(obj))
+
+
+def in_order(rows, ids):
+    """``rows`` (dicts with an 'id') arranged in the order of ``ids``"""
+    by_id = {row['id']: row for row in rows}
+    return [by_id[pk] for pk in ids]
@@ -0,0 +1,72 @@
+"""
+ETags and a shared response cache for per-user read endpoints.
+
+What a user reads only changes when their data version (bumped by every
+transaction write, see rollups), the global data version (category
+changes) or, for endpoints relative to today, the date moves. The ETag is
+built from exactly those, so a conditional request is answered with 304
+after one counter lookup and no aggregate query. Full responses are cached
+as encoded JSON under the request URL and the ETag in the default cache;
+point CACHES at Redis or Memcached to share them between processes.
+"""
+import hashlib
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+from . import versioning
+
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+# Clients may keep a copy but must revalidate it, and shared proxies must not
+CACHE_CONTROL = 'private, no-cache'
+
+
+def etag(user_id):
+    """The current ETag of ``user_id``'s read endpoints (one query)"""
+    keys = [versioning.user_data(user_id), versioning.GLOBAL_DATA]
+    versions = versioning.get_versions(keys)
+    return f'"{user_id}-{versions[keys[0]]}-{versions[keys[1]]}-{date.today():%Y%m%d}"'
+
+
+def matches(if_none_match, current):
+    """True if an If-None-Match header value covers the ``current`` ETag"""
+    if not if_none_match:
+        return False
+    tags = parse_etags(if_none_match)
+    # If-None-Match uses the weak comparison
+    return '*' in tags or current in (tag.removeprefix('W/') for tag in tags)
+
+
+def cached_body(url, current, build):
+    """
+    The response body for ``url`` at ETag ``current``.
+
+    On a miss, ``build()`` produces the encoded body and it is cached; old
+    versions are never read again and simply expire.
+    """
+    key = 'response:' + hashlib.sha256(f'{url}\0{current}'.encode()).hexdigest()
+    body = cache.get(key)
+    if body is None:
+        body = build()
+        cache.set(key, body, RESPONSE_CACHE_TIMEOUT)
+    return body
+
+
+def conditional_response(request, build):
+    """Answer a Django/DRF GET with 304, a cached body or ``build()``'s JSON bytes"""
+    current = etag(request.user.pk)
+    if matches(request.headers.get('If-None-Match'), current):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(
+            cached_body(request.build_absolute_uri(), current, build), content_type='application/json'
+        )
+    response['ETag'] = current
+    response['Cache-Control'] = CACHE_CONTROL
+    patch_vary_headers(response, ['Cookie', 'Authorization'])
+    return response
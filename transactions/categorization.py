@@ -0,0 +1,203 @@
+"""
+Keyword-based transaction categorization.
+
+Rules come from the CategoryRule table (global and per-user) followed by
+the built-in keywords. They are compiled once into a single regular
+expression and cached per process, keyed by the category_rules version
+counter, so a rule edit in any worker reaches every other worker without
+re-reading the rules on each call. Category names are resolved to ids
+through a process-local cache, so a whole batch of descriptions is
+categorized with at most one query.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from . import versioning
+from .models import Category, CategoryRule
+
+DEFAULT_CATEGORY = 'Other'
+
+DEFAULT_KEYWORDS = {
+    'Food': ['restaurant', 'grocery', 'food', 'cafe', 'dinner'],
+    'Transport': ['taxi', 'bus', 'train', 'gas', 'parking'],
+    'Entertainment': ['movie', 'game', 'concert', 'party'],
+    'Utilities': ['electricity', 'water', 'internet', 'phone'],
+    'Shopping': ['clothes', 'shoes', 'amazon', 'store'],
+}
+
+
+class Categorizer:
+    """
+    Matches descriptions against (keyword, category name) rules in priority order.
+
+    All keywords live in one alternation inside a lookahead, so a single
+    scan reports every keyword occurrence; the highest priority rule among
+    them wins, exactly as if each rule had been tried in turn.
+    """
+
+    def __init__(self, rules, default=DEFAULT_CATEGORY):
+        self.rules = [(keyword.lower(), name) for keyword, name in rules if keyword]
+        self.default = default
+        if self.rules:
+            alternatives = '|'.join(f'(?P<r{i}>{re.escape(keyword)})' for i, (keyword, _) in enumerate(self.rules))
+            self.pattern = re.compile(f'(?=(?:{alternatives}))')
+        else:
+            self.pattern = None
+
+    @classmethod
+    def from_keywords(cls, keywords, default=DEFAULT_CATEGORY):
+        return cls(
+            [(keyword, name) for name, words in keywords.items() for keyword in words],
+            default=default,
+        )
+
+    def match(self, description):
+        """Return the category name for a description"""
+        if self.pattern is None or not description:
+            return self.default
+        best = None
+        for found in self.pattern.finditer(str(description).lower()):
+            rule = int(found.lastgroup[1:])
+            if best is None or rule < best:
+                best = rule
+                if rule == 0:
+                    break
+        return self.rules[best][1] if best is not None else self.default
+
+    def match_many(self, descriptions):
+        return [self.match(description) for description in descriptions]
+
+
+DEFAULT_RULES = [(keyword, name) for name, words in DEFAULT_KEYWORDS.items() for keyword in words]
+
+# How long a process trusts its last read of the rules version, in seconds
+RULES_VERSION_CHECK_INTERVAL = getattr(settings, 'CATEGORY_RULES_VERSION_CHECK_INTERVAL', 2)
+MAX_CACHED_CATEGORIZERS = 256
+
+_categorizers = OrderedDict()  # user id (None for global rules only) -> (rules version, Categorizer)
+_rules_version = None
+_rules_version_checked_at = 0.0
+_categorizers_lock = threading.Lock()
+
+_category_ids = {}
+_category_ids_lock = threading.Lock()
+
+
+def load_categorizer(user_id=None):
+    """Compile the active rules visible to a user into a Categorizer"""
+    rules = CategoryRule.objects.filter(is_active=True).filter(
+        Q(user__isnull=True) | Q(user_id=user_id)
+    ).order_by(
+        # A user's own rules beat global ones of the same priority
+        'priority', F('user_id').asc(nulls_last=True), 'id'
+    ).values_list('pattern', 'category__name')
+    return Categorizer(list(rules) + DEFAULT_RULES)
+
+
+def _current_rules_version():
+    global _rules_version, _rules_version_checked_at
+    now = time.monotonic()
+    if _rules_version is None or now - _rules_version_checked_at >= RULES_VERSION_CHECK_INTERVAL:
+        version = versioning.get_version(versioning.CATEGORY_RULES)
+        with _categorizers_lock:
+            if version != _rules_version:
+                # Category ids may have changed along with the rules
+                clear_category_cache()
+            _rules_version, _rules_version_checked_at = version, now
+    return _rules_version
+
+
+def get_categorizer(user=None):
+    """Return the compiled categorizer for a user (or the global rules), rebuilding it if stale"""
+    user_id = getattr(user, 'pk', user)
+    version = _current_rules_version()
+
+    with _categorizers_lock:
+        cached = _categorizers.get(user_id)
+        if cached is not None and cached[0] == version:
+            _categorizers.move_to_end(user_id)
+            return cached[1]
+
+    categorizer = load_categorizer(user_id)
+    with _categorizers_lock:
+        _categorizers[user_id] = (version, categorizer)
+        _categorizers.move_to_end(user_id)
+        while len(_categorizers) > MAX_CACHED_CATEGORIZERS:
+            _categorizers.popitem(last=False)
+    return categorizer
+
+
+def rules_changed():
+    """Invalidate compiled rules here immediately and in other processes on their next check"""
+    versioning.bump(versioning.CATEGORY_RULES)
+    clear_rules_cache()
+
+
+def clear_rules_cache():
+    global _rules_version
+    with _categorizers_lock:
+        _categorizers.clear()
+        _rules_version = None
+    clear_category_cache()
+
+
+def category_ids(names):
+    """Map category names to ids, creating missing categories; cached per process"""
+    # Clears the cache when categories changed in another process
+    _current_rules_version()
+    ids = {}
+    missing = set()
+    for name in names:
+        if name and name not in ids:
+            if name in _category_ids:
+                ids[name] = _category_ids[name]
+            else:
+                missing.add(name)
+
+    if missing:
+        found = dict(Category.objects.filter(name__in=missing).values_list('name', 'id'))
+        new = missing.difference(found)
+        if new:
+            Category.objects.bulk_create([Category(name=name) for name in new], ignore_conflicts=True)
+            found.update(Category.objects.filter(name__in=new).values_list('name', 'id'))
+        ids.update(found)
+        # Only cache committed ids, a rolled back get_or_create must not linger
+        transaction.on_commit(lambda: _remember_category_ids(found))
+    return ids
+
+
+def _remember_category_ids(found):
+    with _category_ids_lock:
+        _category_ids.update(found)
+
+
+def clear_category_cache():
+    with _category_ids_lock:
+        _category_ids.clear()
+
+
+def categorize_many(descriptions, user=None):
+    """Return a category id for each description, using the user's rules"""
+    names = get_categorizer(user).match_many(descriptions)
+    ids = category_ids(names)
+    return [ids[name] for name in names]
+
+
+def categorize(description, user=None):
+    """Return the category id for a single description"""
+    return categorize_many([description], user=user)[0]
+
+
+def assign_categories(transactions, user=None):
+    """Fill in category_id on the unsaved transactions that have none, in one batch"""
+    pending = [t for t in transactions if t.category_id is None]
+    category_ids_ = categorize_many((t.description for t in pending), user=user)
+    for pending_transaction, category_id in zip(pending, category_ids_):
+        pending_transaction.category_id = category_id
+    return transactions
@@ -0,0 +1,199 @@
+"""
+Parquet (Apache Arrow) export and import of transaction histories.
+
+Columns travel as typed Arrow arrays: amounts as decimal128(10, 2), so they
+round-trip exactly, dates as date32 and category names as strings. The
+export encodes the rows of the streaming export cursor (see exports) into
+one row group per ROW_GROUP_SIZE rows and sends each group as soon as it is
+written. The import reads record batches whose values are already typed,
+so there is no text parsing, categorizes them in bulk and writes them with
+the CSV importer's conflict-ignoring INSERTs (importers.insert_new) without
+building model instances.
+
+pyarrow is an optional dependency (it is too large for the serverless
+bundle) and is imported on first use.
+"""
+from importlib.util import find_spec
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import categorization, importers, rollups
+from .models import Transaction
+
+ROW_GROUP_SIZE = 50000
+
+REQUIRED_COLUMNS = ('date', 'description', 'amount')
+UNAVAILABLE = 'Parquet support needs pyarrow, which is not installed'
+_amount_field = Transaction._meta.get_field('amount')
+
+
+def available():
+    """Whether pyarrow is installed; check before sending a response's headers"""
+    return find_spec('pyarrow') is not None
+
+
+def schema():
+    """Arrow schema of an export, in exports.COLUMNS order"""
+    import pyarrow as pa
+
+    return pa.schema([
+        ('id', pa.int64()),
+        ('date', pa.date32()),
+        ('description', pa.string()),
+        ('amount', pa.decimal128(_amount_field.max_digits, _amount_field.decimal_places)),
+        ('category', pa.string()),
+        ('created_at', pa.timestamp('us', tz='UTC')),
+    ])
+
+
+class _Sink:
+    """Write-only file whose contents are handed out after every row group"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data, self.parts = b''.join(self.parts), []
+        return data
+
+
+def parquet_blocks(rows, row_group_size=ROW_GROUP_SIZE):
+    """Encode exports.export_rows() tuples as a Parquet file, one row group at a time"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_schema = schema()
+
+    def encode():
+        sink = _Sink()
+        with pq.ParquetWriter(pa.PythonFile(sink, mode='w'), arrow_schema, compression='zstd') as writer:
+            group = []
+            for row in rows:
+                group.append(row)
+                if len(group) == row_group_size:
+                    writer.write_batch(_record_batch(group, arrow_schema))
+                    group = []
+                    yield sink.take()
+            if group:
+                writer.write_batch(_record_batch(group, arrow_schema))
+        yield sink.take()  # The footer
+
+    return encode()
+
+
+def _record_batch(rows, arrow_schema):
+    import pyarrow as pa
+
+    columns = zip(*rows)
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, arrow_schema)],
+        schema=arrow_schema,
+    )
+
+
+def import_parquet(user, fileobj, batch_size=importers.CHUNK_SIZE):
+    """
+    Import transactions from a Parquet file with 'date', 'description' and
+    'amount' columns, and optionally 'category' (names).
+
+    Amounts may be decimal, integer or floating point columns; they are cast
+    to the model's decimal(10, 2). Rows without a category are
+    auto-categorized, rows already imported are skipped, and the whole
+    import runs in one DB transaction, as with importers.import_csv.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(fileobj)
+    names = parquet.schema_arrow.names
+    missing = [name for name in REQUIRED_COLUMNS if name not in names]
+    if missing:
+        raise ValueError(f"Column(s) not found in Parquet file: {', '.join(missing)}")
+    columns = [*REQUIRED_COLUMNS, *(['category'] if 'category' in names else [])]
+    amount_type = schema().field('amount').type
+
+    result = importers.ImportResult()
+    fingerprints = importers.Fingerprinter()
+    months = set()
+    row_number = 1
+
+    with transaction.atomic():
+        for batch in parquet.iter_batches(batch_size=batch_size, columns=columns):
+            try:
+                dates = batch.column('date').cast(pa.date32()).to_pylist()
+                amounts = batch.column('amount').cast(amount_type).to_pylist()
+                descriptions = batch.column('description').cast(pa.string()).to_pylist()
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                raise ValueError(f'Rows {row_number}-{row_number + batch.num_rows - 1}: {e}') from e
+            categories = batch.column('category').to_pylist() if 'category' in columns else [None] * batch.num_rows
+
+            rows, category_names = [], []
+            for day, description, amount, category in zip(dates, descriptions, amounts, categories):
+                description = (description or '').strip()
+                reason = (
+                    'empty description' if not description else
+                    'empty amount' if amount is None else
+                    'zero amount' if amount == 0 else
+                    'empty date' if day is None else
+                    None
+                )
+                if reason:
+                    result.reject(row_number, reason)
+                else:
+                    rows.append((day, description, amount))
+                    category_names.append((category or '').strip())
+                row_number += 1
+
+            imported = _insert(user, rows, _category_ids(user, rows, category_names), fingerprints)
+            months.update((user.pk, day) for day, _, _ in rows)
+            result.imported += imported
+            result.skipped_duplicates += len(rows) - imported
+
+        # The rows went in without the ORM, so recompute their months' rollups
+        rollups.refresh_months(months)
+
+    return result
+
+
+def _category_ids(user, rows, names):
+    """Category ids for the rows: named categories (created if missing), the rest auto-categorized"""
+    named_ids = categorization.category_ids(names)
+    ids = [named_ids.get(name) for name in names]
+    unnamed = [i for i, category_id in enumerate(ids) if category_id is None]
+    for i, category_id in zip(unnamed, categorization.categorize_many((rows[i][1] for i in unnamed), user=user)):
+        ids[i] = category_id
+    return ids
+
+
+def _insert(user, rows, category_ids, fingerprints):
+    """
+    Insert (date, description, amount) rows, skipping fingerprints the user
+    already has; returns how many were inserted.
+
+    Values are adapted with the backend's adapters directly: field
+    preparation per value is most of the cost of bulk_create.
+    """
+    ops = connection.ops
+    now = ops.adapt_datetimefield_value(timezone.now())
+    return importers.insert_new([
+        (user.pk, ops.adapt_datefield_value(day), description, category_id,
+         ops.adapt_decimalfield_value(amount), now, now, fingerprints(day, description, amount))
+        for (day, description, amount), category_id in zip(rows, category_ids)
+    ])
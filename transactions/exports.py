@@ -0,0 +1,95 @@
+"""
+Streaming CSV, NDJSON and Parquet exports of a user's whole transaction history.
+
+Rows are read with ``QuerySet.iterator()``, which uses a server-side cursor
+on PostgreSQL (and chunked fetches elsewhere), and are encoded and sent a
+block at a time. The first bytes go out before the query has finished and
+memory stays flat however many rows the user has. Behind a transaction-mode
+pooler (DB_TRANSACTION_POOLER) server-side cursors are disabled and the
+driver buffers the result instead.
+
+The CSV columns match what the CSV importer reads by default, so an export
+can be imported again.
+"""
+import csv
+import io
+
+import orjson
+
+from . import columnar
+from .models import Transaction
+
+EXPORT_CHUNK_SIZE = 2000  # Rows fetched from the cursor at a time
+ROWS_PER_BLOCK = 1000  # Rows encoded into each block sent to the client
+
+COLUMNS = ('id', 'date', 'description', 'amount', 'category', 'created_at')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',  # Needs pyarrow, see columnar
+}
+
+
+def export_rows(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """Iterate over ``user``'s transactions, oldest first, as tuples in COLUMNS order"""
+    return (
+        Transaction.objects.filter(user=user)
+        .order_by('date', 'created_at', 'id')
+        .values_list('id', 'date', 'description', 'amount', 'category__name', 'created_at')
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def _blocks(rows, size=ROWS_PER_BLOCK):
+    block = []
+    for row in rows:
+        block.append(row)
+        if len(block) == size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def csv_blocks(rows):
+    """Encode rows as CSV bytes, the header first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    yield buffer.getvalue().encode()
+    for block in _blocks(rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            (pk, day.isoformat(), description, amount, category or '', created_at.isoformat())
+            for pk, day, description, amount, category, created_at in block
+        )
+        yield buffer.getvalue().encode()
+
+
+def ndjson_blocks(rows):
+    """Encode rows as one JSON object per line; amounts are decimal strings"""
+    for block in _blocks(rows):
+        yield b''.join(
+            orjson.dumps(dict(zip(COLUMNS, (pk, day, description, str(amount), category, created_at))),
+                         option=orjson.OPT_UTC_Z | orjson.OPT_APPEND_NEWLINE)
+            for pk, day, description, amount, category, created_at in block
+        )
+
+
+def unavailable(kind):
+    """Why ``kind`` cannot be exported here, or None; a stream can only fail after its 200"""
+    if kind == 'parquet' and not columnar.available():
+        return columnar.UNAVAILABLE
+    return None
+
+
+def stream(user, kind):
+    """The export of ``user``'s history in ``kind`` (a CONTENT_TYPES key) as a generator of bytes"""
+    encode = {'csv': csv_blocks, 'ndjson': ndjson_blocks, 'parquet': columnar.parquet_blocks}[kind]
+    return encode(export_rows(user))
+
+
+def filename(kind):
+    return f'transactions.{kind}'
@@ -0,0 +1,314 @@
+"""
+CSV import shared by the DRF, web and FastAPI endpoints.
+
+The upload is decoded incrementally and parsed in fixed-size chunks. Each
+chunk is normalized and written with batched multi-row INSERTs, so the
+parsed rows held at once depend on CHUNK_SIZE rather than on the size of
+the file. What does grow with the file is small: the Fingerprinter's
+record of the rows seen so far and the set of months to refresh.
+
+Every imported row carries a fingerprint that is unique per user, so
+re-importing an overlapping statement skips the rows already stored with
+a conflict-ignoring insert instead of comparing against the user's history.
+
+pandas and numpy are imported by the functions that parse, not at module
+load, so processes that never import a CSV do not pay for them at startup.
+"""
+import hashlib
+import io
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+
+from . import categorization, rollups
+from .models import Transaction
+
+DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%Y/%m/%d')
+
+CHUNK_SIZE = 5000
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+
+# Columns written by insert_new(), in the order of its value tuples
+INSERT_FIELDS = ('user', 'date', 'description', 'category', 'amount', 'created_at', 'updated_at', 'fingerprint')
+
+
+def fingerprint(date, description, amount, occurrence=0):
+    """
+    Stable identity of an imported row.
+
+    ``occurrence`` numbers identical rows within one file, so two equal
+    purchases on the same day are both kept while a re-import of either is not.
+    """
+    key = '|'.join([
+        date.isoformat(),
+        ' '.join(str(description).split()).casefold(),
+        str(Decimal(amount).quantize(Decimal('0.01'))),
+        str(occurrence),
+    ])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class Fingerprinter:
+    """
+    Assigns fingerprints across all the rows of one file.
+
+    It remembers every row of the file, so its memory grows with the file
+    (about 70 bytes a row): rows are kept as 64-bit prefixes of their
+    fingerprints, and only repeated rows get a count.
+    """
+
+    def __init__(self):
+        self.seen = set()
+        self.repeats = {}
+
+    def __call__(self, date, description, amount):
+        base = fingerprint(date, description, amount)
+        key = int(base[:16], 16)
+        if key not in self.seen:
+            self.seen.add(key)
+            return base
+        occurrence = self.repeats[key] = self.repeats.get(key, 0) + 1
+        return fingerprint(date, description, amount, occurrence)
+
+    def assign(self, transactions):
+        for t in transactions:
+            if t.fingerprint is None:
+                t.fingerprint = self(t.date, t.description, t.amount)
+        return transactions
+
+
+def save_transactions(user, transactions, months, batch_size=BATCH_SIZE):
+    """
+    Insert imported transactions, skipping ones whose fingerprint the user already has.
+
+    Returns (imported, skipped). Rows without a fingerprint get one; pass
+    the same Fingerprinter's output when a file is saved in several calls.
+    Which rows were skipped is unknown, so the (user id, date) pairs of all
+    of them are added to ``months``; the caller recomputes those rollups
+    once with rollups.refresh_months after its last call.
+    """
+    if not transactions:
+        return 0, 0
+    Fingerprinter().assign(transactions)
+    now = timezone.now()
+    fields = [Transaction._meta.get_field(name) for name in INSERT_FIELDS]
+    values = []
+    for t in transactions:
+        t.user_id, t.created_at, t.updated_at = user.pk, now, now
+        values.append(tuple(field.get_db_prep_save(getattr(t, field.attname), connection) for field in fields))
+
+    with transaction.atomic():
+        imported = insert_new(values, batch_size)
+    months.update((user.pk, t.date) for t in transactions)
+    return imported, len(transactions) - imported
+
+
+def insert_new(values, batch_size=None):
+    """
+    Insert rows of INSERT_FIELDS values, already prepared for the database,
+    skipping fingerprints the user already has; returns how many were inserted.
+
+    The count comes from the INSERTs themselves, so it stays right when
+    another import of the same rows runs concurrently. The statements are
+    built from the backend's own bulk insert pieces, like bulk_create with
+    ignore_conflicts=True, but without model instances or per-row field
+    preparation.
+    """
+    fields = [Transaction._meta.get_field(name) for name in INSERT_FIELDS]
+    ops = connection.ops
+    per_statement = max(1, ops.bulk_batch_size(fields, values))
+    if batch_size:
+        per_statement = min(per_statement, batch_size)
+    insert = (
+        f'{ops.insert_statement(on_conflict=OnConflict.IGNORE)} {ops.quote_name(Transaction._meta.db_table)} '
+        f"({', '.join(ops.quote_name(field.column) for field in fields)}) VALUES "
+    )
+    suffix = ops.on_conflict_suffix_sql(fields, OnConflict.IGNORE, None, None)
+    placeholder = f"({', '.join(['%s'] * len(fields))})"
+
+    inserted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(values), per_statement):
+            chunk = values[start:start + per_statement]
+            cursor.execute(f"{insert}{', '.join([placeholder] * len(chunk))} {suffix}",
+                           [value for row in chunk for value in row])
+            inserted += cursor.rowcount
+    return inserted
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.skipped_duplicates = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, row_number, reason):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f'Row {row_number}: {reason}')
+
+
+def open_text(fileobj, encoding='utf-8'):
+    """Wrap a binary upload so it is decoded as it is read instead of all at once"""
+    if isinstance(fileobj, io.TextIOBase):
+        return fileobj
+    return io.TextIOWrapper(fileobj, encoding=encoding, newline='')
+
+
+def iter_csv_chunks(fileobj, chunk_size=CHUNK_SIZE):
+    """Yield DataFrames of at most ``chunk_size`` rows, every column as a string"""
+    import pandas as pd
+
+    text = open_text(fileobj)
+    try:
+        yield from pd.read_csv(text, chunksize=chunk_size, dtype=str, keep_default_na=False)
+    finally:
+        # Leave the underlying upload open for its owner to close. An abandoned
+        # generator may only be finalized after the owner already did
+        if text is not fileobj and not fileobj.closed:
+            text.detach()
+
+
+def parse_dates(values, formats=DATE_FORMATS):
+    """Parse a string Series trying each format in turn; unparseable values become NaT"""
+    import pandas as pd
+
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    for fmt in formats:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(values[missing], format=fmt, errors='coerce')
+    return parsed
+
+
+def parse_amounts(values):
+    """Strip currency symbols, separators and spaces; return amounts in integer cents (NaN if invalid)"""
+    import numpy as np
+    import pandas as pd
+
+    numbers = pd.to_numeric(values.str.replace(r'[$,\s]', '', regex=True), errors='coerce')
+    numbers[~np.isfinite(numbers)] = np.nan
+    return (numbers * 100).round()
+
+
+# Checks in the order a row is validated; the first failure is its rejection reason
+_CHECKS = (
+    ('description', 'empty description'),
+    ('amount_empty', 'empty amount'),
+    ('amount_invalid', 'invalid amount {amount!r}'),
+    ('amount_zero', 'zero amount'),
+    ('date_empty', 'empty date'),
+    ('date_invalid', 'invalid date {date!r}'),
+)
+
+
+def normalize_frame(frame, columns, first_row=2):
+    """
+    Validate and clean a chunk of raw CSV rows with whole-column operations.
+
+    Returns (rows, rejections): ``rows`` is a DataFrame with 'date',
+    'description', 'amount' (Decimal) and 'category' columns holding only
+    the valid rows, and ``rejections`` a list of (row number, reason).
+    """
+    import numpy as np
+    import pandas as pd
+
+    frame = frame.fillna('')  # Short rows leave NaN in the trailing columns
+    description = frame[columns['description']].str.strip()
+    raw_amount = frame[columns['amount']]
+    raw_date = frame[columns['date']].str.strip()
+    cents = parse_amounts(raw_amount)
+    dates = parse_dates(raw_date)
+
+    amount_empty = (raw_amount.str.len() == 0) | raw_amount.str.isspace()
+    failures = {
+        'description': (description == '').to_numpy(),
+        'amount_empty': amount_empty.to_numpy(),
+        'amount_invalid': cents.isna().to_numpy(),
+        'amount_zero': (cents == 0).to_numpy(),
+        'date_empty': (raw_date == '').to_numpy(),
+        'date_invalid': dates.isna().to_numpy(),
+    }
+    rejected = np.logical_or.reduce(list(failures.values()))
+
+    rejections = []
+    for position in np.flatnonzero(rejected).tolist():
+        for check, reason in _CHECKS:
+            if failures[check][position]:
+                break
+        reason = reason.format(amount=raw_amount.iat[position].strip(), date=raw_date.iat[position])
+        rejections.append((first_row + position, reason))
+
+    valid = ~rejected
+    category_column = columns.get('category')
+    if category_column and category_column in frame.columns:
+        category = frame.loc[valid, category_column].str.strip()
+    else:
+        category = pd.Series('', index=frame.index[valid], dtype=object)
+
+    rows = pd.DataFrame({
+        'date': dates[valid].dt.date,
+        'description': description[valid],
+        'amount': [Decimal(int(c)).scaleb(-2) for c in cents[valid].to_numpy()],
+        'category': category,
+    })
+    return rows, rejections
+
+
+def import_csv(user, fileobj, columns, chunk_size=CHUNK_SIZE):
+    """
+    Stream transactions from a CSV upload into the database.
+
+    ``columns`` maps 'date', 'description', 'amount' and optionally 'category'
+    to CSV column names. Rows without a category column value are
+    auto-categorized. Rows already imported are skipped and counted in
+    ``skipped_duplicates``. The whole import runs in one DB transaction.
+    """
+    result = ImportResult()
+    row_offset = 2  # 1-based, after the header line
+    fingerprints = Fingerprinter()
+    months = set()
+
+    with transaction.atomic():
+        for chunk in iter_csv_chunks(fileobj, chunk_size=chunk_size):
+            missing = [columns[key] for key in ('date', 'description', 'amount') if columns[key] not in chunk.columns]
+            if missing:
+                raise ValueError(f"Column(s) not found in CSV: {', '.join(missing)}")
+
+            rows, rejections = normalize_frame(chunk, columns, first_row=row_offset)
+            for number, reason in rejections:
+                result.reject(number, reason)
+            row_offset += len(chunk)
+
+            if rows.empty:
+                continue
+
+            category_names = rows['category'].tolist()
+            named_ids = categorization.category_ids(category_names)
+            transactions = [
+                Transaction(
+                    user=user,
+                    date=parsed_date,
+                    description=description,
+                    amount=amount,
+                    category_id=named_ids.get(category_name),
+                    fingerprint=fingerprints(parsed_date, description, amount),
+                )
+                for parsed_date, description, amount, category_name in zip(
+                    rows['date'].tolist(), rows['description'].tolist(), rows['amount'].tolist(), category_names
+                )
+            ]
+
+            categorization.assign_categories(transactions, user=user)
+            imported, skipped = save_transactions(user, transactions, months)
+            result.imported += imported
+            result.skipped_duplicates += skipped
+
+        rollups.refresh_months(months)
+
+    return result
@@ -0,0 +1,158 @@
+"""
+Background statement imports.
+
+An upload is stored as an ImportJob and the request returns straight away.
+Workers started with ``manage.py run_import_worker`` claim queued jobs from
+the database, parse the statement and insert its rows in batches, recording
+progress on the job as they go. The ImportJob table is the queue, so there
+is no broker to run.
+
+Batches commit one at a time so progress is visible while a job runs; a
+retried job is safe because fingerprints make re-inserted rows no-ops.
+"""
+import io
+import logging
+import time
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import categorization, importers, rollups, statements
+from .models import ImportJob, Transaction
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 2  # Seconds an idle worker waits before looking for work again
+STALE_AFTER = timedelta(minutes=10)  # A running job without a heartbeat this long lost its worker
+MAX_ATTEMPTS = 3
+
+
+def enqueue(user, kind, upload, file_name=None):
+    """Store an uploaded statement as a queued job"""
+    if kind not in statements.PARSERS:
+        raise ValueError(f'Unknown import kind: {kind!r}')
+    if file_name is None:
+        file_name = getattr(upload, 'name', None) or ''
+    return ImportJob.objects.create(
+        user=user,
+        kind=kind,
+        file_name=file_name,
+        content=upload.read(),
+    )
+
+
+def claim():
+    """Mark the oldest queued job as running and return it, or None if the queue is empty"""
+    while True:
+        with transaction.atomic():
+            # skip_locked lets concurrent workers pass over each other's candidate
+            candidate = ImportJob.objects.select_for_update(skip_locked=True).filter(
+                status=ImportJob.QUEUED
+            ).order_by('created_at').values_list('pk', flat=True).first()
+            if candidate is None:
+                return None
+            now = timezone.now()
+            # The status check keeps the claim exclusive where row locks are unavailable (SQLite)
+            claimed = ImportJob.objects.filter(pk=candidate, status=ImportJob.QUEUED).update(
+                status=ImportJob.RUNNING,
+                attempts=F('attempts') + 1,
+                started_at=now,
+                heartbeat_at=now,
+                processed_rows=0,
+                imported=0,
+                skipped_duplicates=0,
+            )
+        if claimed:
+            return ImportJob.objects.select_related('user').get(pk=candidate)
+
+
+def requeue_stale():
+    """Return running jobs whose worker died to the queue, failing those out of attempts"""
+    now = timezone.now()
+    stale = ImportJob.objects.filter(status=ImportJob.RUNNING, heartbeat_at__lt=now - STALE_AFTER)
+    stale.filter(attempts__lt=MAX_ATTEMPTS).update(status=ImportJob.QUEUED)
+    stale.update(
+        status=ImportJob.FAILED,
+        error='The import worker stopped responding',
+        finished_at=now,
+        content=None,
+    )
+
+
+def _rows_to_transactions(job, rows, fingerprints, category_ids):
+    transactions = []
+    for row in rows:
+        transactions.append(Transaction(
+            user_id=job.user_id,
+            date=row['date'],
+            description=row['description'],
+            amount=row['amount'],
+            category_id=category_ids.get(row.get('category')),
+            fingerprint=fingerprints(row['date'], row['description'], row['amount']),
+        ))
+    return categorization.assign_categories(transactions, user=job.user_id)
+
+
+def run(job, batch_size=importers.BATCH_SIZE):
+    """Parse and import a claimed job, recording progress and the outcome on it"""
+    jobs = ImportJob.objects.filter(pk=job.pk)
+    months = set()
+    try:
+        rows = statements.PARSERS[job.kind](io.BytesIO(job.content))
+        job.total_rows = len(rows)
+        jobs.update(total_rows=job.total_rows, heartbeat_at=timezone.now())
+
+        fingerprints = importers.Fingerprinter()
+        category_ids = categorization.category_ids(row.get('category') for row in rows)
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            transactions = _rows_to_transactions(job, batch, fingerprints, category_ids)
+            imported, skipped = importers.save_transactions(job.user, transactions, months)
+
+            job.processed_rows += len(batch)
+            job.imported += imported
+            job.skipped_duplicates += skipped
+            jobs.update(
+                processed_rows=job.processed_rows,
+                imported=job.imported,
+                skipped_duplicates=job.skipped_duplicates,
+                heartbeat_at=timezone.now(),
+            )
+        job.status = ImportJob.SUCCEEDED
+    except ImportError as e:
+        job.status = ImportJob.FAILED
+        job.error = f'PDF processing libraries not available: {e}'
+    except Exception as e:
+        logger.exception('Import job %s failed', job.pk)
+        job.status = ImportJob.FAILED
+        job.error = f'PDF processing failed: {e}'
+
+    # Batches are committed as they go, so this also covers a job that failed part way
+    rollups.refresh_months(months)
+
+    job.finished_at = timezone.now()
+    job.content = None
+    jobs.update(status=job.status, error=job.error, finished_at=job.finished_at, content=None)
+    return job
+
+
+def work(once=False, poll_interval=POLL_INTERVAL):
+    """
+    Process queued jobs until interrupted; with ``once``, stop when the queue is empty.
+
+    Returns the number of jobs processed.
+    """
+    processed = 0
+    while True:
+        close_old_connections()
+        requeue_stale()
+        job = claim()
+        if job is not None:
+            run(job)
+            processed += 1
+            continue
+        if once:
+            return processed
+        time.sleep(poll_interval)
@@ -0,0 +1,22 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions import rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly rollup table from the raw transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only rebuild rollups for this username')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        count = rollups.rebuild(user=user)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} monthly rollup rows'))
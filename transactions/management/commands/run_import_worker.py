@@ -0,0 +1,40 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from transactions import jobs
+
+
+class Command(BaseCommand):
+    help = 'Process queued statement imports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Number of worker processes')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=jobs.POLL_INTERVAL,
+                            help='Seconds to wait between polls of an empty queue')
+
+    def handle(self, *args, **options):
+        kwargs = {'once': options['once'], 'poll_interval': options['poll_interval']}
+        if options['workers'] <= 1:
+            processed = jobs.work(**kwargs)
+            self.stdout.write(self.style.SUCCESS(f'Processed {processed} import jobs'))
+            return
+
+        # Parsing is CPU bound, so scale with processes; children must not share the parent's connection.
+        # Not daemonic: a worker may start its own pool for PDF page extraction
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=jobs.work, kwargs=kwargs)
+            for _ in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+        self.stdout.write(self.style.SUCCESS('Import workers stopped'))
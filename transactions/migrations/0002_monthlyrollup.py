@@ -0,0 +1,64 @@
+# Generated by Django 4.2.8 on 2026-10-17 04:18
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+import django.db.models.deletion
+
+
+def populate_rollups(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    MonthlyRollup = apps.get_model('transactions', 'MonthlyRollup')
+
+    buckets = Transaction.objects.order_by().annotate(month=TruncMonth('date')).values(
+        'user_id', 'month', 'category_id'
+    ).annotate(
+        income=Sum('amount', filter=Q(amount__lt=0)),
+        expenses=Sum('amount', filter=Q(amount__gt=0)),
+        income_count=Count('id', filter=Q(amount__lt=0)),
+        expense_count=Count('id', filter=Q(amount__gt=0)),
+    )
+    MonthlyRollup.objects.bulk_create(
+        [
+            MonthlyRollup(
+                user_id=bucket['user_id'],
+                month=bucket['month'],
+                category_id=bucket['category_id'],
+                income=bucket['income'] or 0,
+                expenses=bucket['expenses'] or 0,
+                income_count=bucket['income_count'],
+                expense_count=bucket['expense_count'],
+            )
+            for bucket in buckets
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('income', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expenses', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('income_count', models.IntegerField(default=0)),
+                ('expense_count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='transactions.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'month', 'category'), name='unique_monthly_rollup_bucket')],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.8 on 2026-10-17 04:39
+
+import hashlib
+from collections import Counter
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def _fingerprint(date, description, amount, occurrence):
+    # Frozen copy of transactions.importers.fingerprint
+    key = '|'.join([
+        date.isoformat(),
+        ' '.join(str(description).split()).casefold(),
+        str(Decimal(amount).quantize(Decimal('0.01'))),
+        str(occurrence),
+    ])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def populate_fingerprints(apps, schema_editor):
+    # Existing rows may have come from imports, so fingerprint them all and
+    # let the next import of the same statement skip them
+    Transaction = apps.get_model('transactions', 'Transaction')
+
+    seen = Counter()
+    batch = []
+    for row in Transaction.objects.order_by('id').only('id', 'user_id', 'date', 'description', 'amount').iterator(chunk_size=2000):
+        base = (row.user_id, row.date, ' '.join(row.description.split()).casefold(), row.amount)
+        row.fingerprint = _fingerprint(row.date, row.description, row.amount, seen[base])
+        seen[base] += 1
+        batch.append(row)
+        if len(batch) >= 1000:
+            Transaction.objects.bulk_update(batch, ['fingerprint'])
+            batch = []
+    if batch:
+        Transaction.objects.bulk_update(batch, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_categoryrule_versioncounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(populate_fingerprints, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(fields=('user', 'fingerprint'), name='unique_transaction_fingerprint'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.8 on 2026-10-17 06:31
+
+from django.db import migrations
+
+TRIGRAM_INDEX = 'category_name_trgm'
+
+
+def _trigram_index():
+    from django.contrib.postgres.indexes import GinIndex, OpClass
+    from django.db.models.functions import Upper
+
+    # icontains compiles to UPPER(name::text) LIKE UPPER('%...%'), which a
+    # trigram index on the same expression can answer
+    return GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name=TRIGRAM_INDEX)
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        # pg_trgm is a trusted extension (PostgreSQL 13+), the database owner can create it
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.add_index(apps.get_model('transactions', 'Category'), _trigram_index())
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('transactions', 'Category'), _trigram_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0007_transaction_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -12,6 +12,26 @@ class Category(models.Model):
     class Meta:
         verbose_name_plural = "Categories"
 
+class TransactionQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create bypasses model signals, so feed the monthly rollups here
+        from .rollups import record_transactions, refresh_months
+
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if kwargs.get('ignore_conflicts'):
+            # Conflicting rows were silently dropped, so the inserted ones are unknown
+            refresh_months({(obj.user_id, obj.date) for obj in objs})
+        else:
+            record_transactions(objs)
+        return objs
+
+    def delete(self):
+        # Fold the per-row post_delete rollup deltas into one update per bucket
+        from .rollups import deferred
+
+        with deferred():
+            return super().delete()
+
 class Transaction(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transactions')
     date = models.DateField()
@@ -20,6 +40,9 @@ class Transaction(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)  # Positive for expenses, negative for income
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    fingerprint = models.CharField(max_length=64, null=True, blank=True, editable=False)  # Set by importers, see importers.fingerprint
+
+    objects = TransactionQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.description} - {self.amount}"
@@ -34,3 +57,98 @@ class Transaction(models.Model):
 
     class Meta:
         ordering = ['-date', '-created_at']
+        indexes = [
+            # Matches Meta.ordering for the per-user transaction lists
+            models.Index(fields=['user', '-date', '-created_at'], name='transaction_user_date_idx'),
+            # Covers date-range aggregates split on the sign of amount
+            models.Index(fields=['user', 'date', 'amount', 'category'], name='transaction_user_date_amt_idx'),
+        ]
+        constraints = [
+            # Imported rows are deduplicated on insert; NULL (manual entries) never conflicts
+            models.UniqueConstraint(fields=['user', 'fingerprint'], name='unique_transaction_fingerprint'),
+        ]
+
+class MonthlyRollup(models.Model):
+    """Per (user, month, category) totals, maintained incrementally from Transaction writes"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_rollups')
+    month = models.DateField()  # Always the first day of the month
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True)
+    income = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # Sum of negative amounts
+    expenses = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # Sum of positive amounts
+    income_count = models.IntegerField(default=0)
+    expense_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} {self.month:%Y-%m} {self.category_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month', 'category'], name='unique_monthly_rollup_bucket'),
+        ]
+
+class CategoryRule(models.Model):
+    """Assigns ``category`` to transactions whose description contains ``pattern``"""
+    pattern = models.CharField(max_length=100)  # Case-insensitive substring of the description
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='rules')
+    priority = models.IntegerField(default=100)  # Lower numbers are tried first
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='category_rules')  # Empty for rules that apply to everyone
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.pattern} -> {self.category}"
+
+    class Meta:
+        ordering = ['priority', 'id']
+
+class VersionCounter(models.Model):
+    """Monotonic counters that let every process notice a change with one cheap lookup"""
+    key = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}={self.value}"
+
+class ImportJob(models.Model):
+    """An uploaded statement waiting for, or processed by, an import worker"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='import_jobs')
+    kind = models.CharField(max_length=30)  # Key of statements.PARSERS
+    file_name = models.CharField(max_length=255, blank=True)
+    content = models.BinaryField(null=True)  # The upload, cleared once the job finishes
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.IntegerField(default=0)
+    total_rows = models.IntegerField(null=True, blank=True)  # Known once the file is parsed
+    processed_rows = models.IntegerField(default=0)
+    imported = models.IntegerField(default=0)
+    skipped_duplicates = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # Refreshed by the worker while it runs
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.kind} import {self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The worker's claim query: oldest queued job first
+            models.Index(fields=['status', 'created_at'], name='importjob_status_created_idx'),
+        ]
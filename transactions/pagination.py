@@ -0,0 +1,156 @@
+"""
+Keyset (cursor) pagination over (date, created_at, id), newest first.
+
+Shared by the DRF viewset, the FastAPI routes and the web transaction list.
+A cursor is an opaque token holding the sort key of the row a page starts
+after, so fetching page N is the same index range scan as page 1.
+"""
+import base64
+import json
+from collections import namedtuple
+from datetime import date, datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+ORDERING = ('-date', '-created_at', '-id')
+REVERSE_ORDERING = ('date', 'created_at', 'id')
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+Page = namedtuple('Page', ['items', 'next_cursor', 'previous_cursor'])
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _sort_key(row):
+    if isinstance(row, dict):
+        return row['date'], row['created_at'], row['id']
+    return row.date, row.created_at, row.id
+
+
+def encode_cursor(row, direction=NEXT):
+    row_date, created_at, pk = _sort_key(row)
+    payload = json.dumps([direction, row_date.isoformat(), created_at.isoformat(), pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (direction, (date, created_at, id)) or raise InvalidCursor"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, row_date, created_at, pk = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in (NEXT, PREVIOUS):
+            raise ValueError(direction)
+        return direction, (date.fromisoformat(row_date), datetime.fromisoformat(created_at), int(pk))
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor(f'Invalid cursor: {token!r}') from e
+
+
+def clamp_limit(value, default=DEFAULT_PAGE_SIZE):
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _older_than(key):
+    row_date, created_at, pk = key
+    return (
+        Q(date__lt=row_date)
+        | Q(date=row_date, created_at__lt=created_at)
+        | Q(date=row_date, created_at=created_at, id__lt=pk)
+    )
+
+
+def _newer_than(key):
+    row_date, created_at, pk = key
+    return (
+        Q(date__gt=row_date)
+        | Q(date=row_date, created_at__gt=created_at)
+        | Q(date=row_date, created_at=created_at, id__gt=pk)
+    )
+
+
+def paginate(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Fetch one page of ``queryset`` newest first.
+
+    Raises InvalidCursor if the token cannot be decoded. Works with model
+    instances as well as ``values()`` dicts that include date, created_at and id.
+    """
+    direction, key = decode_cursor(cursor) if cursor else (NEXT, None)
+    limit = clamp_limit(limit)
+
+    if direction == NEXT:
+        queryset = queryset.order_by(*ORDERING)
+        if key is not None:
+            queryset = queryset.filter(_older_than(key))
+    else:
+        queryset = queryset.order_by(*REVERSE_ORDERING).filter(_newer_than(key))
+
+    rows = list(queryset[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == PREVIOUS:
+        rows.reverse()
+
+    next_cursor = previous_cursor = None
+    if rows:
+        if has_more or direction == PREVIOUS:
+            next_cursor = encode_cursor(rows[-1], NEXT)
+        if key is not None and (has_more or direction == NEXT):
+            previous_cursor = encode_cursor(rows[0], PREVIOUS)
+    return Page(rows, next_cursor, previous_cursor)
+
+
+class KeysetPagination(BasePagination):
+    """DRF adapter: ``?cursor=<token>&limit=<n>``, responds with next/previous links"""
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            self.page = paginate(
+                queryset,
+                cursor=request.query_params.get(self.cursor_query_param),
+                limit=request.query_params.get(self.limit_query_param, DEFAULT_PAGE_SIZE),
+            )
+        except InvalidCursor:
+            raise NotFound('Invalid cursor')
+        return self.page.items
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._link(self.page.next_cursor),
+            'previous': self._link(self.page.previous_cursor),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,79 @@
+"""
+Fast read path for transaction lists.
+
+Shared by the DRF viewset and the FastAPI routes. Rows are fetched as
+``values()`` dicts with the category name joined in the same query, so no
+model instances or per-row serializer objects are built, and the page is
+encoded to JSON bytes in one orjson call.
+
+The DRF projection produces what TransactionSerializer would: amounts as
+decimal strings and datetimes in ISO 8601 with a 'Z' suffix. The one
+difference is that category_name is null, rather than missing, for
+uncategorized rows.
+"""
+from decimal import Decimal
+
+import orjson
+from django.db.models import F
+from rest_framework import renderers
+
+# TransactionSerializer fields; 'user' and 'category' are the foreign key ids
+TRANSACTION_FIELDS = ('id', 'user', 'date', 'description', 'category', 'amount', 'created_at', 'updated_at')
+
+
+def transaction_values(queryset):
+    """``queryset`` as dicts shaped like TransactionSerializer output"""
+    return queryset.values(*TRANSACTION_FIELDS, category_name=F('category__name'))
+
+
+def api_transaction_values(queryset):
+    """``queryset`` as dicts with the FastAPI TransactionResponse fields, plus created_at for the cursor"""
+    return queryset.values(
+        'id', 'date', 'description', 'amount', 'category_id', 'created_at', category_name=F('category__name')
+    )
+
+
+def api_transaction_rows(rows):
+    """TransactionResponse dicts from api_transaction_values() rows"""
+    return [
+        {
+            'id': row['id'],
+            'date': row['date'],
+            'description': row['description'],
+            'amount': float(row['amount']),
+            'category_id': row['category_id'],
+            'category_name': row['category_name'],
+        }
+        for row in rows
+    ]
+
+
+def _encoder(decimal):
+    def default(value):
+        if isinstance(value, Decimal):
+            return decimal(value)
+        raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+    return default
+
+
+def dumps(data, decimal=str):
+    """
+    Encode ``data`` to JSON bytes; dates, datetimes and UUIDs are handled.
+
+    Decimals become strings by default, like DRF serializer fields; pass
+    ``decimal=float`` to match DRF's JSONEncoder on plain dicts. Non-string
+    dict keys become strings, as with the json module.
+    """
+    return orjson.dumps(data, default=_encoder(decimal), option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """DRF renderer using dumps(); falls back to the stock renderer for indented output"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Serializer output already holds decimal strings; raw Decimals render as numbers, as before
+        return dumps(data, decimal=float)
@@ -0,0 +1,311 @@
+"""
+Monthly rollups: per (user, month, category) income and expense totals.
+
+Every Transaction write feeds a delta into MonthlyRollup, so summaries and
+trends read a handful of rollup rows instead of rescanning a user's history.
+The same writes bump the user's data version, which read endpoints turn into
+ETags (see caching).
+"""
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Subquery, Sum
+from django.db.models.functions import TruncMonth
+
+from . import versioning
+from .models import MonthlyRollup, Transaction
+
+_local = threading.local()
+
+_date_field = Transaction._meta.get_field('date')
+_amount_field = Transaction._meta.get_field('amount')
+_cents = Decimal('0.01')
+
+
+def month_start(value):
+    """Return the first day of the month containing ``value``"""
+    return value.replace(day=1)
+
+
+def period_start(year, month):
+    """
+    The first day of ``month`` of ``year``, both ints or query string values.
+
+    Raises ValueError when they do not name a month.
+    """
+    try:
+        return date(int(year), int(month), 1)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f'Invalid month {month!r} of year {year!r}') from None
+
+
+def row_of(instance):
+    """Return the (user_id, date, category_id, amount) tuple a transaction rolls up as"""
+    return (instance.user_id, instance.date, instance.category_id, instance.amount)
+
+
+def _add(deltas, row, sign):
+    user_id, date_value, category_id, amount = row
+    date_value = _date_field.to_python(date_value)
+    amount = _amount_field.to_python(amount).quantize(_cents)
+
+    bucket = deltas.setdefault(
+        (user_id, month_start(date_value), category_id),
+        [Decimal('0'), Decimal('0'), 0, 0],
+    )
+    if amount < 0:
+        bucket[0] += sign * amount
+        bucket[2] += sign
+    elif amount > 0:
+        bucket[1] += sign * amount
+        bucket[3] += sign
+
+
+def _submit(deltas):
+    pending = getattr(_local, 'pending', None)
+    if pending is None:
+        _apply(deltas)
+        return
+
+    for key, values in deltas.items():
+        bucket = pending.setdefault(key, [Decimal('0'), Decimal('0'), 0, 0])
+        for i, value in enumerate(values):
+            bucket[i] += value
+
+
+def _apply(deltas):
+    with transaction.atomic():
+        for key, values in deltas.items():
+            if any(values):
+                _upsert(key, *values)
+        # Even a write that leaves the totals alone (a new description) changes what the user reads
+        _bump_users({user_id for user_id, _, _ in deltas})
+
+
+def _bump_users(user_ids):
+    for user_id in sorted(user_ids):
+        versioning.bump(versioning.user_data(user_id))
+
+
+def _upsert(key, income, expenses, income_count, expense_count):
+    user_id, month, category_id = key
+    bucket = MonthlyRollup.objects.filter(user_id=user_id, month=month, category_id=category_id)
+    target = MonthlyRollup.objects.filter(pk=Subquery(bucket.values('pk')[:1]))
+    changes = {
+        'income': F('income') + income,
+        'expenses': F('expenses') + expenses,
+        'income_count': F('income_count') + income_count,
+        'expense_count': F('expense_count') + expense_count,
+    }
+
+    if target.update(**changes):
+        return
+
+    try:
+        with transaction.atomic():
+            MonthlyRollup.objects.create(
+                user_id=user_id,
+                month=month,
+                category_id=category_id,
+                income=income,
+                expenses=expenses,
+                income_count=income_count,
+                expense_count=expense_count,
+            )
+    except IntegrityError:
+        # Another writer created the bucket first
+        target.update(**changes)
+
+
+@contextmanager
+def deferred():
+    """
+    Collect rollup deltas made inside the block and apply them on exit.
+
+    Many writes to the same month and category then cost one UPDATE per
+    bucket instead of one per transaction. Nested blocks join the outermost.
+    """
+    if getattr(_local, 'pending', None) is not None:
+        yield
+        return
+
+    _local.pending = {}
+    try:
+        yield
+    except BaseException:
+        _local.pending = None
+        raise
+    pending, _local.pending = _local.pending, None
+    _apply(pending)
+
+
+def record_transactions(objs):
+    """Add newly inserted transactions to their rollup buckets"""
+    deltas = {}
+    for obj in objs:
+        _add(deltas, row_of(obj), 1)
+    if deltas:
+        _submit(deltas)
+
+
+def record_change(previous, current):
+    """Move a transaction between buckets; either side may be None for create/delete"""
+    deltas = {}
+    if previous is not None:
+        _add(deltas, previous, -1)
+    if current is not None:
+        _add(deltas, current, 1)
+    if deltas:
+        _submit(deltas)
+
+
+def merge_category(category):
+    """Fold a category's buckets into the uncategorized ones before it is deleted"""
+    rows = MonthlyRollup.objects.filter(category=category).values_list(
+        'user_id', 'month', 'income', 'expenses', 'income_count', 'expense_count'
+    )
+    deltas = {
+        (user_id, month, None): [income, expenses, income_count, expense_count]
+        for user_id, month, income, expenses, income_count, expense_count in rows
+    }
+    if deltas:
+        _submit(deltas)
+
+
+def _bucket_totals(transactions):
+    return transactions.order_by().annotate(month=TruncMonth('date')).values(
+        'user_id', 'month', 'category_id'
+    ).annotate(
+        income=Sum('amount', filter=Q(amount__lt=0)),
+        expenses=Sum('amount', filter=Q(amount__gt=0)),
+        income_count=Count('id', filter=Q(amount__lt=0)),
+        expense_count=Count('id', filter=Q(amount__gt=0)),
+    )
+
+
+def _create(buckets):
+    return MonthlyRollup.objects.bulk_create(
+        [
+            MonthlyRollup(
+                user_id=bucket['user_id'],
+                month=bucket['month'],
+                category_id=bucket['category_id'],
+                income=bucket['income'] or 0,
+                expenses=bucket['expenses'] or 0,
+                income_count=bucket['income_count'],
+                expense_count=bucket['expense_count'],
+            )
+            for bucket in buckets
+        ],
+        batch_size=1000,
+    )
+
+
+def rebuild(user=None):
+    """Recompute rollups from the raw transactions, for one user or everyone"""
+    transactions = Transaction.objects.all()
+    rollups = MonthlyRollup.objects.all()
+    if user is not None:
+        transactions = transactions.filter(user=user)
+        rollups = rollups.filter(user=user)
+
+    with transaction.atomic():
+        rollups.delete()
+        created = _create(_bucket_totals(transactions))
+        if user is not None:
+            _bump_users([user.pk])
+        else:
+            versioning.bump(versioning.GLOBAL_DATA)
+    return len(created)
+
+
+def refresh_months(pairs):
+    """
+    Recompute the rollups of the given (user_id, date) months from the raw transactions.
+
+    Used where the rows actually written are unknown, such as bulk inserts
+    that ignore conflicts. Costs one aggregate over each month, not the
+    user's whole history. Refreshes of the same user are serialized by a
+    lock on the user row, so two imports cannot both recreate a bucket.
+    """
+    months = {}
+    for user_id, date_value in pairs:
+        months.setdefault(user_id, set()).add(month_start(_date_field.to_python(date_value)))
+
+    pending = getattr(_local, 'pending', None)
+    with transaction.atomic():
+        for user_id, starts in sorted(months.items()):
+            # Held until commit; a no-op on SQLite, where writers take the whole database
+            list(User.objects.select_for_update().filter(pk=user_id).values_list('pk', flat=True))
+            if pending:
+                # Already-written rows in these months are counted by the recompute
+                for key in [key for key in pending if key[0] == user_id and key[1] in starts]:
+                    del pending[key]
+            in_months = Q()
+            for start in starts:
+                in_months |= Q(date__gte=start, date__lt=(start + timedelta(days=32)).replace(day=1))
+            MonthlyRollup.objects.filter(user_id=user_id, month__in=starts).delete()
+            _create(_bucket_totals(Transaction.objects.filter(in_months, user_id=user_id)))
+        _bump_users(months)
+
+
+def summary(user, year=None, month=None, top=5):
+    """
+    Income and expense totals and counts, the expense breakdown by category
+    and its ``top`` categories.
+
+    One query: the period's rollup rows grouped by category. The overall
+    totals are the sums of those groups, so the API, FastAPI and dashboard
+    all get everything in a single round trip. Raises ValueError for an
+    invalid ``year``/``month`` (see period_start).
+    """
+    rollups = MonthlyRollup.objects.filter(user=user)
+    if month and year:
+        rollups = rollups.filter(month=period_start(year, month))
+
+    groups = rollups.order_by().values('category_id', 'category__name').annotate(
+        income=Sum('income'),
+        expenses=Sum('expenses'),
+        income_count=Sum('income_count'),
+        expense_count=Sum('expense_count'),
+    )
+
+    total_income = total_expenses = 0
+    income_count = expense_count = 0
+    category_summary = []
+    for group in groups:
+        total_income += group['income']
+        total_expenses += group['expenses']
+        income_count += group['income_count']
+        expense_count += group['expense_count']
+        if group['expense_count']:
+            category_summary.append({
+                'category__name': group['category__name'],
+                'total': group['expenses'],
+                'count': group['expense_count'],
+            })
+    category_summary.sort(key=lambda row: (-row['total'], row['category__name'] or ''))
+
+    return {
+        'total_income': total_income,
+        'total_expenses': total_expenses,
+        'income_count': income_count,
+        'expense_count': expense_count,
+        'category_summary': category_summary,
+        'top_categories': category_summary[:top],
+    }
+
+
+def trends(user, start_date, end_date):
+    """Monthly income and expense totals for the months overlapping the date range"""
+    return MonthlyRollup.objects.filter(
+        user=user,
+        month__range=[month_start(start_date), end_date]
+    ).values('month').annotate(
+        income=Sum('income'),
+        expenses=Sum('expenses')
+    ).order_by('month')
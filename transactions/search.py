@@ -0,0 +1,110 @@
+"""
+Full-text search over transaction descriptions.
+
+Every word of the query must start a word of the description ('star cof'
+finds 'STARBUCKS COFFEE #12'), case-insensitively. Each backend answers from
+an index that the database keeps in sync by itself, so raw inserts and
+bulk updates are covered too (migration 0007):
+
+* PostgreSQL: a GIN index on to_tsvector('simple', description), matched
+  with a prefix tsquery and ranked with ts_rank.
+* SQLite: an FTS5 table over the description with insert, update and
+  delete triggers, ranked with bm25. Accents are ignored.
+* Anything else: a case-insensitive substring match per word, unranked.
+
+The 'simple' configuration does no stemming, which suits merchant names in
+any language.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+MAX_TERMS = 8
+
+FTS_TABLE = 'transactions_transaction_fts'
+FTS_CONFIG = 'simple'
+
+
+def terms(text):
+    """The words of a search query; anything but letters and digits separates them"""
+    return re.findall(r'\w+', (text or '').casefold())[:MAX_TERMS]
+
+
+def _vector():
+    from django.contrib.postgres.search import SearchVector
+
+    # Must stay the expression the GIN index of migration 0007 was built from
+    return SearchVector('description', config=FTS_CONFIG)
+
+
+def _tsquery(words):
+    from django.contrib.postgres.search import SearchQuery
+
+    return SearchQuery(' & '.join(f'{word}:*' for word in words), config=FTS_CONFIG, search_type='raw')
+
+
+def _fts_match(words):
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+_has_fts_table = {}  # Database name -> whether migration 0007 created the FTS5 table
+
+
+def _uses_fts5():
+    if connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if name not in _has_fts_table:
+        _has_fts_table[name] = FTS_TABLE in connection.introspection.table_names()
+    return _has_fts_table[name]
+
+
+def matching(queryset, text):
+    """Filter a Transaction queryset to descriptions matching ``text``; its ordering is kept"""
+    words = terms(text)
+    if not words:
+        return queryset
+    if connection.vendor == 'postgresql':
+        return queryset.alias(search_vector=_vector()).filter(search_vector=_tsquery(words))
+    if _uses_fts5():
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [_fts_match(words)]
+        ))
+    for word in words:
+        queryset = queryset.filter(description__icontains=word)
+    return queryset
+
+
+def ranked_ids(queryset, text, limit=SEARCH_LIMIT):
+    """
+    The ids of the ``limit`` Transactions of ``queryset`` that best match
+    ``text``, best first; equally good matches come most recently added first.
+    """
+    words = terms(text)
+    if not words:
+        return []
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchRank
+
+        query = _tsquery(words)
+        return list(
+            queryset.alias(search_vector=_vector()).filter(search_vector=query)
+            .alias(rank=SearchRank(_vector(), query)).order_by('-rank', '-id')
+            .values_list('pk', flat=True)[:limit]
+        )
+    if _uses_fts5():
+        # bm25 ranks only exist inside the FTS query, so rank the matching ids
+        # of the queryset there. The unary + stops SQLite from probing the FTS
+        # index once per id.
+        candidates, params = matching(queryset, text).order_by().values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND +rowid IN ({candidates}) '
+                f'ORDER BY rank, rowid DESC LIMIT %s',
+                [_fts_match(words), *params, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+    return list(matching(queryset, text).order_by('-id').values_list('pk', flat=True)[:limit])
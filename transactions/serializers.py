@@ -1,11 +1,23 @@
 from rest_framework import serializers
-from .models import Category, Transaction
+from .models import Category, CategoryRule, ImportJob, Transaction
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'created_at', 'updated_at']
 
+class CategoryRuleSerializer(serializers.ModelSerializer):
+    category_name = serializers.CharField(source='category.name', read_only=True)
+
+    class Meta:
+        model = CategoryRule
+        fields = ['id', 'pattern', 'category', 'category_name', 'priority', 'is_active', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+
+    def create(self, validated_data):
+        validated_data['user'] = self.context['request'].user
+        return super().create(validated_data)
+
 class TransactionSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
 
@@ -16,4 +28,34 @@ class TransactionSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'kind', 'file_name', 'status', 'attempts', 'total_rows', 'processed_rows',
+            'imported', 'skipped_duplicates', 'error', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+class TransactionBatchCreateSerializer(serializers.Serializer):
+    # Category ids are checked for the whole batch at once, see batch.validate
+    date = serializers.DateField()
+    description = serializers.CharField(max_length=255)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    category = serializers.IntegerField(source='category_id', required=False, allow_null=True)
+
+class TransactionBatchUpdateSerializer(TransactionBatchCreateSerializer):
+    id = serializers.IntegerField()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Updates are partial: only the fields sent are changed
+        for name in ('date', 'description', 'amount'):
+            self.fields[name].required = False
+
+class TransactionBatchSerializer(serializers.Serializer):
+    create = TransactionBatchCreateSerializer(many=True, default=list)
+    update = TransactionBatchUpdateSerializer(many=True, default=list)
+    delete = serializers.ListField(child=serializers.IntegerField(), default=list)
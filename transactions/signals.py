@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import categorization, rollups, tokens, versioning
+from .models import Category, CategoryRule, Transaction
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_rollup_bucket(sender, instance, raw, **kwargs):
+    """Capture the stored values so an update can move the old amount out of its bucket"""
+    instance._rollup_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._rollup_previous = Transaction.objects.filter(pk=instance.pk).values_list(
+        'user_id', 'date', 'category_id', 'amount'
+    ).first()
+
+
+@receiver(post_save, sender=Transaction)
+def update_rollups_on_save(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    rollups.record_change(getattr(instance, '_rollup_previous', None), rollups.row_of(instance))
+
+
+@receiver(post_delete, sender=Transaction)
+def update_rollups_on_delete(sender, instance, origin=None, **kwargs):
+    # Deleting a user cascades to their rollups as well, nothing to adjust
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin is not None and origin_model is not Transaction:
+        return
+    rollups.record_change(rollups.row_of(instance), None)
+
+
+@receiver(pre_delete, sender=Category)
+def merge_category_rollups(sender, instance, **kwargs):
+    # Transactions fall back to no category (SET_NULL), so their totals follow them
+    rollups.merge_category(instance)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=CategoryRule)
+@receiver(post_delete, sender=CategoryRule)
+def invalidate_category_rules(sender, **kwargs):
+    # Renaming or deleting a category changes what the compiled rules resolve to
+    categorization.rules_changed()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_global_data_version(sender, **kwargs):
+    # Category names appear in every user's lists and summaries
+    versioning.bump(versioning.GLOBAL_DATA)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_credentials(sender, instance, **kwargs):
+    # A changed password or deactivated user must not keep passing the Basic
+    # auth cache, nor keep using bearer tokens issued before
+    tokens.forget_user(instance.pk)
@@ -0,0 +1,272 @@
+"""
+PDF statement parsers used by the import jobs.
+
+Each parser takes a binary file object and returns a list of row dicts with
+'date', 'description', 'amount' and, when the statement has one, 'category'.
+PARSERS maps the ImportJob kind to its parser.
+
+Statement lines are read with a StatementProfile: one compiled expression
+per bank date convention that pulls the date, description and amount out
+of a line in a single match. The profile is detected once per statement
+and then applied to every line.
+"""
+import io
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from itertools import repeat
+
+from django.conf import settings
+
+from . import tabula_worker
+
+# Descriptions that mark a positive amount as money coming in
+INCOME_KEYWORDS = ['abono', 'deposito', 'transferencia recibida', 'intereses']
+
+# 1,234.56 / -45 / $45.67 / 123.45$ / -$ 12.00 / $-12.00, at most one sign
+AMOUNT = r'(?:-\s?\$?\s?|\$\s?-?)?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d{1,2})?\$?'
+# Statements with a balance column print every amount with its cents
+AMOUNT_WITH_CENTS = r'(?:-\s?\$?\s?|\$\s?-?)?(?:\d{1,3}(?:,\d{3})+|\d+)\.\d{2}\$?'
+
+
+# English and Spanish month abbreviations for DD-Mon-YYYY dates
+MONTHS = {
+    name: number
+    for names in (
+        ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'],
+        ['ene', 'feb', 'mar', 'abr', 'may', 'jun', 'jul', 'ago', 'sep', 'oct', 'nov', 'dic'],
+    )
+    for number, name in enumerate(names, 1)
+}
+MONTHS['set'] = 9
+
+
+class StatementProfile:
+    """
+    A bank's line layout: a date, the description, then the amount.
+
+    ``date_pattern`` names its parts as day, month (digits or an
+    abbreviation) and year groups, which is much cheaper than strptime.
+    """
+
+    def __init__(self, name, date_pattern, balance=False):
+        self.name = name
+        # When the bank prints a running balance, the amount needs its cents:
+        # otherwise a number ending the description ('RETIRO 24 50,000.00')
+        # would pass for the amount. The balance itself may be missing
+        amount = AMOUNT_WITH_CENTS if balance else AMOUNT
+        balance_pattern = rf'(?:\s+{AMOUNT_WITH_CENTS})?' if balance else ''
+        self.pattern = re.compile(
+            rf'(?:{date_pattern})\s+(?:(?P<description>.*?\S)\s+)??'
+            rf'(?P<amount>{amount}){balance_pattern}\s*$'
+        )
+
+    def __repr__(self):
+        return f'<StatementProfile {self.name}>'
+
+    def parse_line(self, line):
+        """Return {'date', 'description', 'amount'} for a transaction line, or None"""
+        found = self.pattern.search(line)
+        if found is None:
+            return None
+        month = found['month']
+        month = int(month) if month.isdigit() else MONTHS.get(month.lower())
+        try:
+            parsed_date = date(int(found['year']), month, int(found['day']))
+        except (TypeError, ValueError):
+            return None
+        try:
+            amount = float(found['amount'].replace('$', '').replace(',', '').replace(' ', ''))
+        except ValueError:
+            return None
+        return {'date': parsed_date, 'description': found['description'] or '', 'amount': amount}
+
+    def parse_lines(self, lines):
+        rows = []
+        for line in lines:
+            row = self.parse_line(line)
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    def count_matches(self, lines):
+        return sum(1 for line in lines if self.pattern.search(line))
+
+
+PROFILES = {
+    'colombian': StatementProfile('colombian', r'(?P<day>\d{2})-(?P<month>\d{2})-(?P<year>\d{4})', balance=True),
+    'us': StatementProfile('us', r'(?P<month>\d{2})/(?P<day>\d{2})/(?P<year>\d{4})'),
+    'month_name': StatementProfile('month_name', r'(?P<day>\d{2})-(?P<month>[A-Za-z]{3})-(?P<year>\d{4})'),
+    'iso': StatementProfile('iso', r'(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})'),
+}
+
+
+def detect_profile(pages):
+    """
+    Pick the profile matching the most lines of the first page that has any match.
+
+    Returns None when no page looks like a statement.
+    """
+    for text in pages:
+        lines = text.splitlines()
+        counts = {name: profile.count_matches(lines) for name, profile in PROFILES.items()}
+        best = max(counts, key=counts.get)
+        if counts[best]:
+            return PROFILES[best]
+    return None
+
+
+def _row_line(values):
+    # Blank cells come back from tabula as NaN
+    return ' '.join(str(value).strip() for value in values if value == value and str(value).strip())
+
+
+def parse_bank_statement(fileobj):
+    """Colombian bank statement tables: date, description, amount and balance columns"""
+    profile = PROFILES['colombian']
+    rows = []
+    for df in tabula_worker.read_tables(fileobj.read()):
+        if df.empty or len(df) < 2:
+            continue
+        for values in df.itertuples(index=False, name=None):
+            row = profile.parse_line(_row_line(values))
+            if row is None or row['amount'] == 0:
+                continue
+            if not row['description']:
+                row['description'] = f"Transaction {row['date']}"
+            # For Colombian bank statements, amounts are typically expenses (negative)
+            # unless they contain keywords indicating income
+            description = row['description'].lower()
+            if row['amount'] > 0 and not any(word in description for word in INCOME_KEYWORDS):
+                row['amount'] = -row['amount']
+            rows.append(row)
+    return rows
+
+
+def _find_column(columns, keywords):
+    matches = [col for col in columns if any(keyword in col.lower() for keyword in keywords)]
+    return matches[0] if matches else None
+
+
+TABLE_DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y', '%Y/%m/%d']
+
+
+def parse_tables(fileobj):
+    """Tables with recognizable headers (fecha, descripcion, valor, categoria...)"""
+    rows = []
+    for df in tabula_worker.read_tables(fileobj.read()):
+        if df.empty:
+            continue
+
+        df.columns = df.columns.str.strip().str.lower()
+        date_col = _find_column(df.columns, ['date', 'fecha', 'fecha_transaccion']) or df.columns[0]
+        desc_col = _find_column(df.columns, ['description', 'desc', 'descripcion', 'concepto', 'detalle'])
+        if desc_col is None:
+            desc_col = df.columns[1] if len(df.columns) > 1 else df.columns[0]
+        amount_col = _find_column(df.columns, ['amount', 'monto', 'valor', 'importe', 'total']) or df.columns[-1]
+        category_col = _find_column(df.columns, ['category', 'categoria', 'tipo', 'clasificacion'])
+
+        for _, row in df.iterrows():
+            try:
+                date_str = str(row[date_col]).strip()
+                parsed_date = None
+                for fmt in TABLE_DATE_FORMATS:
+                    try:
+                        parsed_date = datetime.strptime(date_str, fmt).date()
+                        break
+                    except ValueError:
+                        continue
+                if parsed_date is None:
+                    continue  # Skip rows without valid dates
+
+                amount_str = str(row[amount_col]).strip().replace('$', '').replace(',', '').strip()
+                try:
+                    amount = float(amount_str)
+                except ValueError:
+                    continue  # Skip rows without valid amounts
+
+                description = str(row[desc_col]).strip()
+                if not description:
+                    continue
+
+                category = str(row[category_col]).strip() if category_col is not None else ''
+                rows.append({'date': parsed_date, 'description': description, 'amount': amount, 'category': category})
+            except Exception:
+                # Skip problematic rows but continue processing
+                continue
+    return rows
+
+
+# Size of the shared page extraction pool; documents shorter than
+# PARALLEL_MIN_PAGES are not worth shipping to other processes
+PDF_EXTRACT_WORKERS = getattr(settings, 'PDF_EXTRACT_WORKERS', None) or os.cpu_count() or 1
+PARALLEL_MIN_PAGES = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _page_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the parent may hold DB connections and threads
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def _extract_pages(content, start, stop):
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        return [page.extract_text() or '' for page in pdf.pages[start:stop]]
+
+
+def extract_page_texts(content, pool=None, workers=PDF_EXTRACT_WORKERS):
+    """
+    Return the text of every page of a PDF, in page order.
+
+    Long documents are split into contiguous page ranges extracted in
+    parallel by ``pool`` (the shared process pool by default); the ranges
+    are merged back in order, so the output is the same as a serial pass.
+    """
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        page_count = len(pdf.pages)
+        if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+            return [page.extract_text() or '' for page in pdf.pages]
+
+    # A couple of ranges per worker evens out pages of uneven density
+    ranges = min(page_count, workers * 2)
+    bounds = [page_count * i // ranges for i in range(ranges + 1)]
+    pool = pool or _page_pool()
+    texts = []
+    for part in pool.map(_extract_pages, repeat(content), bounds[:-1], bounds[1:]):
+        texts.extend(part)
+    return texts
+
+
+def parse_text(fileobj):
+    """Statements as plain text lines: a date, a description and an amount per line"""
+    pages = extract_page_texts(fileobj.read())
+    profile = detect_profile(pages)
+    if profile is None:
+        return []
+    rows = []
+    for text in pages:
+        rows.extend(row for row in profile.parse_lines(text.splitlines()) if row['description'])
+    return rows
+
+
+PARSERS = {
+    'bank_statement': parse_bank_statement,
+    'tables': parse_tables,
+    'text': parse_text,
+}
@@ -0,0 +1,170 @@
+"""
+A warm tabula extractor.
+
+``tabula.read_pdf`` pays for JVM start-up (or a whole ``java`` subprocess)
+on every call, which dominates small statements. Here one thread per
+process starts the JVM through jpype once, keeps the tabula classes loaded
+and serves extraction requests from a local queue; all JVM calls stay on
+that thread.
+
+Each PDF is loaded once and every page is tried with the lattice
+(ruled table) algorithm, falling back to stream extraction over the
+detected table areas for that page only, instead of re-reading the whole
+document for a second mode.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class TabulaUnavailable(ImportError):
+    """jpype, Java or the tabula jar could not be loaded"""
+
+
+class ExtractionWorker:
+    """
+    Runs ``handler(state, content)`` on a single long-lived thread.
+
+    ``setup()`` runs once on that thread before the first request and its
+    result is passed to every handler call. If it fails, the error is
+    raised for every request.
+    """
+
+    def __init__(self, setup, handler, name='extraction-worker'):
+        self.setup = setup
+        self.handler = handler
+        self.name = name
+        self.requests = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def submit(self, content):
+        """Queue ``content`` for extraction; returns a Future with the handler's result"""
+        future = Future()
+        self.requests.put((content, future))
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._serve, name=self.name, daemon=True)
+                self.thread.start()
+        return future
+
+    def extract(self, content, timeout=None):
+        return self.submit(content).result(timeout)
+
+    def _serve(self):
+        try:
+            state, setup_error = self.setup(), None
+        except Exception as e:
+            logger.exception('%s failed to start', self.name)
+            state, setup_error = None, e
+
+        while True:
+            content, future = self.requests.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            if setup_error is not None:
+                future.set_exception(setup_error)
+                continue
+            try:
+                future.set_result(self.handler(state, content))
+            except Exception as e:
+                future.set_exception(e)
+
+
+class _Tabula:
+    """The tabula-java classes, looked up once the JVM is running"""
+
+    def __init__(self):
+        try:
+            import jpype
+            import jpype.imports  # noqa: F401  (enables ``import technology.tabula``)
+            from tabula.backend import jar_path
+        except ImportError as e:
+            raise TabulaUnavailable(f'jpype and tabula-py are required: {e}') from e
+
+        try:
+            if not jpype.isJVMStarted():
+                jpype.addClassPath(jar_path())
+                jpype.startJVM(
+                    '-Djava.awt.headless=true',
+                    '-Dorg.slf4j.simpleLogger.defaultLogLevel=off',
+                    '-Dorg.apache.commons.logging.Log=org.apache.commons.logging.impl.NoOpLog',
+                    convertStrings=False,
+                )
+            from org.apache.pdfbox.pdmodel import PDDocument
+            from technology.tabula import ObjectExtractor
+            from technology.tabula.detectors import NurminenDetectionAlgorithm
+            from technology.tabula.extractors import BasicExtractionAlgorithm, SpreadsheetExtractionAlgorithm
+        except Exception as e:
+            raise TabulaUnavailable(f'Could not start tabula in the JVM: {e}') from e
+
+        self.PDDocument = PDDocument
+        self.ObjectExtractor = ObjectExtractor
+        self.lattice = SpreadsheetExtractionAlgorithm()
+        self.stream = BasicExtractionAlgorithm()
+        self.detector = NurminenDetectionAlgorithm()
+
+    def page_tables(self, page):
+        tables = [table for table in self.lattice.extract(page) if table.getRowCount() > 0]
+        if tables:
+            return tables
+        areas = self.detector.detect(page)
+        if not areas:
+            return list(self.stream.extract(page))
+        tables = []
+        for area in areas:
+            tables.extend(self.stream.extract(page.getArea(area)))
+        return tables
+
+    def read_tables(self, content):
+        """Rows of every table in the document, page by page, as lists of cell strings"""
+        document = self.PDDocument.load(content)
+        try:
+            extractor = self.ObjectExtractor(document)
+            tables = []
+            pages = extractor.extract()
+            while pages.hasNext():
+                for table in self.page_tables(pages.next()):
+                    rows = [[str(cell.getText()) for cell in row] for row in table.getRows()]
+                    if rows:
+                        tables.append(rows)
+            return tables
+        finally:
+            document.close()
+
+
+def _header(cells):
+    # Same labels pandas gives tabula-py output: blanks become "Unnamed: i", repeats get ".n"
+    seen = {}
+    header = []
+    for i, cell in enumerate(cells):
+        name = cell.strip() or f'Unnamed: {i}'
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        header.append(name)
+    return header
+
+
+_worker = ExtractionWorker(_Tabula, lambda tabula, content: tabula.read_tables(content), name='tabula-worker')
+
+
+def read_tables(content, timeout=None):
+    """
+    Extract the tables of a PDF as DataFrames, first row as the header.
+
+    Raises TabulaUnavailable if the JVM cannot be started.
+    """
+    import pandas as pd
+
+    frames = []
+    for rows in _worker.extract(content, timeout=timeout):
+        width = max(len(row) for row in rows)
+        rows = [row + [''] * (width - len(row)) for row in rows]
+        frames.append(pd.DataFrame(rows[1:], columns=_header(rows[0])))
+    return frames
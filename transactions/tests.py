@@ -1,9 +1,14 @@
 import pytest
-from django.test import TestCase
+from importlib.util import find_spec
+from unittest import skipUnless
+from django.test import SimpleTestCase, TestCase
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.utils import timezone
+from datetime import date
 from decimal import Decimal
-from .models import Category, Transaction
+from . import caching, categorization, columnar, exports, importers, jobs, rollups, search, statements, tokens, versioning
+from .models import Category, CategoryRule, ImportJob, MonthlyRollup, Transaction
 
 class CategoryModelTest(TestCase):
     def test_category_creation(self):
@@ -42,6 +47,7 @@ class TransactionModelTest(TestCase):
 
 class TransactionAPITest(TestCase):
     def setUp(self):
+        cache.clear()  # Response bodies are cached by ETag, which repeats across rolled back tests
         self.user = User.objects.create_user(username='testuser', password='testpass')
         self.category = Category.objects.create(name="Food")
         self.client.login(username='testuser', password='testpass')
@@ -56,7 +62,7 @@ class TransactionAPITest(TestCase):
         )
         response = self.client.get('/api/transactions/')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.json()['results']), 1)
 
     def test_transaction_create(self):
         data = {
@@ -69,6 +75,64 @@ class TransactionAPITest(TestCase):
         self.assertEqual(response.status_code, 201)
         self.assertEqual(Transaction.objects.count(), 1)
 
+    def test_list_projection_matches_serializer(self):
+        import json
+        from rest_framework.renderers import JSONRenderer
+        from .serializers import TransactionSerializer
+
+        Transaction.objects.create(user=self.user, date=date(2024, 3, 1), description="Lunch",
+                                   category=self.category, amount=Decimal('12.50'))
+        Transaction.objects.create(user=self.user, date=date(2024, 3, 2), description="Refund", amount=-7)
+        with self.assertNumQueries(4):  # Session, user, data version, one joined page query
+            response = self.client.get('/api/transactions/')
+
+        expected = json.loads(JSONRenderer().render(
+            TransactionSerializer(Transaction.objects.order_by('-date'), many=True).data
+        ))
+        expected[0]['category_name'] = None  # The serializer leaves it out when there is no category
+        self.assertEqual(json.loads(response.content)['results'], expected)
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.login(username='testuser', password='testpass')
+        # Several rows share a date so the created_at/id tie-breakers matter
+        for i in range(7):
+            Transaction.objects.create(
+                user=self.user, date=date(2024, 1, 1 + i // 3), description=f"Item {i}", amount=i + 1
+            )
+        self.expected = list(Transaction.objects.order_by('-date', '-created_at', '-id').values_list('id', flat=True))
+
+    def test_api_walks_forward_and_back(self):
+        seen, pages = [], []
+        url = '/api/transactions/?limit=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json()['results']), 3)
+            pages.append(response.json())
+            seen.extend(row['id'] for row in response.json()['results'])
+            url = response.json()['next']
+        self.assertEqual(seen, self.expected)
+        self.assertIsNone(pages[0]['previous'])
+
+        response = self.client.get(pages[-1]['previous'])
+        self.assertEqual([row['id'] for row in response.json()['results']], self.expected[3:6])
+        response = self.client.get(response.json()['previous'])
+        self.assertEqual([row['id'] for row in response.json()['results']], self.expected[:3])
+        self.assertIsNone(response.json()['previous'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/transactions/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_web_list_next_page(self):
+        response = self.client.get('/api/web/transactions/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t.id for t in response.context['transactions']], self.expected)
+        self.assertIsNone(response.context['next_query'])
+
 class CSVImportTest(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='testuser', password='testpass')
@@ -100,7 +164,895 @@ class CSVImportTest(TestCase):
             {'file': pdf_file},
             format='multipart'
         )
-        # PDF import might fail in test environment without proper PDF structure
-        # but we test that the endpoint exists and handles the request
-        # 500 indicates libraries not available, which is acceptable for testing
-        self.assertIn(response.status_code, [201, 400, 500])
+        # The PDF is parsed by an import worker, the request only queues it
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['job']['status'], 'queued')
+
+class MonthlyRollupTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.food = Category.objects.create(name="Food")
+        self.client.login(username='testuser', password='testpass')
+
+    def assertRollupsMatchRebuild(self):
+        fields = ('user_id', 'month', 'category_id', 'income', 'expenses', 'income_count', 'expense_count')
+        incremental = sorted(MonthlyRollup.objects.exclude(income_count=0, expense_count=0).values_list(*fields))
+        rollups.rebuild()
+        self.assertEqual(incremental, sorted(MonthlyRollup.objects.values_list(*fields)))
+
+    def test_rollups_follow_create_update_delete(self):
+        lunch = Transaction.objects.create(
+            user=self.user, date=date(2024, 3, 5), description="Lunch", category=self.food, amount=Decimal('20.00')
+        )
+        Transaction.objects.create(user=self.user, date=date(2024, 3, 1), description="Salary", amount=Decimal('-500.00'))
+        lunch.amount = Decimal('25.50')
+        lunch.date = date(2024, 4, 2)
+        lunch.save()
+        self.assertRollupsMatchRebuild()
+
+        lunch.delete()
+        self.assertRollupsMatchRebuild()
+
+    def test_rollups_follow_bulk_create_and_category_delete(self):
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, date=date(2024, 3, day), description="Cafe", category=self.food, amount=10)
+            for day in range(1, 11)
+        ])
+        self.assertEqual(MonthlyRollup.objects.get(category=self.food).expense_count, 10)
+
+        self.food.delete()
+        self.assertRollupsMatchRebuild()
+        self.assertEqual(MonthlyRollup.objects.get(category=None).expenses, Decimal('100.00'))
+
+    def test_summary_reads_rollups(self):
+        Transaction.objects.create(user=self.user, date=date(2024, 3, 5), description="Lunch", category=self.food, amount=30)
+        Transaction.objects.create(user=self.user, date=date(2024, 3, 6), description="Salary", amount=-100)
+        Transaction.objects.create(user=self.user, date=date(2024, 4, 6), description="Dinner", category=self.food, amount=15)
+
+        response = self.client.get('/api/transactions/summary/', {'month': 3, 'year': 2024})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_income'], Decimal('100.00'))
+        self.assertEqual(response.json()['total_expenses'], Decimal('30.00'))
+        self.assertEqual(response.json()['category_summary'][0]['category__name'], 'Food')
+
+    def test_summary_rejects_invalid_periods(self):
+        for params in [{'month': 13, 'year': 2024}, {'month': 3, 'year': 'abc'}]:
+            self.assertEqual(self.client.get('/api/transactions/summary/', params).status_code, 400)
+        with self.assertRaisesMessage(ValueError, "Invalid month '13' of year '2024'"):
+            rollups.summary(self.user, year='2024', month='13')
+
+    def test_summary_is_one_query(self):
+        transport = Category.objects.create(name="Transport")
+        for day, description, category, amount in [
+            (5, "Lunch", self.food, 30), (6, "Dinner", self.food, 10), (7, "Bus", transport, 5),
+            (8, "Salary", None, -100),
+        ]:
+            Transaction.objects.create(user=self.user, date=date(2024, 3, day), description=description,
+                                       category=category, amount=amount)
+        Transaction.objects.create(user=self.user, date=date(2024, 4, 1), description="Cafe", category=self.food, amount=15)
+
+        with self.assertNumQueries(1):
+            totals = rollups.summary(self.user, year=2024, month=3, top=1)
+        self.assertEqual((totals['total_income'], totals['total_expenses']), (Decimal('-100'), Decimal('45')))
+        self.assertEqual((totals['income_count'], totals['expense_count']), (1, 3))
+        self.assertEqual(
+            [(row['category__name'], row['total'], row['count']) for row in totals['category_summary']],
+            [('Food', Decimal('40'), 2), ('Transport', Decimal('5'), 1)],
+        )
+        self.assertEqual(totals['top_categories'], totals['category_summary'][:1])
+        self.assertEqual(rollups.summary(self.user)['total_expenses'], Decimal('60'))
+
+class StreamingCSVImportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.columns = {'date': 'date', 'description': 'description', 'amount': 'amount'}
+
+    def test_import_in_chunks(self):
+        from io import BytesIO
+        csv_content = (
+            "date,description,amount\n"
+            "2023-01-01,Lunch,25.50\n"
+            "02-01-2023,Dinner,\"$1,030.00\"\n"
+            "2023-01-03,Taxi,abc\n"
+            "2023-01-04,,12\n"
+            "2023-01-05,Salary,-900\n"
+        )
+        result = importers.import_csv(self.user, BytesIO(csv_content.encode('utf-8')), self.columns, chunk_size=2)
+
+        self.assertEqual(result.imported, 3)
+        self.assertEqual(result.rejected, 2)
+        self.assertEqual(result.errors, ["Row 4: invalid amount 'abc'", 'Row 5: empty description'])
+        self.assertEqual(
+            sorted(Transaction.objects.values_list('date', 'amount')),
+            [(date(2023, 1, 1), Decimal('25.50')), (date(2023, 1, 2), Decimal('1030.00')), (date(2023, 1, 5), Decimal('-900.00'))]
+        )
+        self.assertEqual(sum(MonthlyRollup.objects.values_list('expense_count', flat=True)), 2)
+
+    def test_normalize_frame(self):
+        import pandas as pd
+        frame = pd.DataFrame({
+            'date': ['2023-01-31', '31-01-2023', '31/01/2023', '2023/01/31', '2023-13-01', '2023-01-01', ''],
+            'description': [' Lunch ', 'Taxi', 'Cafe', 'Bus', 'Gym', 'Rent', 'Book'],
+            'amount': ['$1,200.50', '-3', ' 4.1 ', '5', '6', '0', '7'],
+        })
+        rows, rejections = importers.normalize_frame(frame, self.columns)
+
+        self.assertEqual(list(rows['date']), [date(2023, 1, 31)] * 4)
+        self.assertEqual(list(rows['description']), ['Lunch', 'Taxi', 'Cafe', 'Bus'])
+        self.assertEqual(list(rows['amount']), [Decimal('1200.50'), Decimal('-3.00'), Decimal('4.10'), Decimal('5.00')])
+        self.assertEqual(rejections, [(6, "invalid date '2023-13-01'"), (7, 'zero amount'), (8, 'empty date')])
+
+    def test_missing_column(self):
+        from io import BytesIO
+        with self.assertRaises(ValueError):
+            importers.import_csv(self.user, BytesIO(b"when,what,howmuch\n2023-01-01,Lunch,1\n"), self.columns)
+        self.assertEqual(Transaction.objects.count(), 0)
+
+    def test_web_import_skips_existing_rows(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        self.client.login(username='testuser', password='testpass')
+        csv_content = b"date,description,amount\n2023-01-01,Lunch,25.50\n2023-01-02,Dinner,30.00\n"
+        data = {'date_column': 'date', 'description_column': 'description', 'amount_column': 'amount'}
+
+        self.client.post('/api/web/import/csv/', {**data, 'file': SimpleUploadedFile('a.csv', csv_content)})
+        self.client.post('/api/web/import/csv/', {**data, 'file': SimpleUploadedFile('a.csv', csv_content)})
+        self.assertEqual(Transaction.objects.count(), 2)
+
+    def test_reimport_skips_fingerprinted_rows(self):
+        from io import BytesIO
+        first = b"date,description,amount\n2023-01-01,Coffee,3\n2023-01-01,Coffee,3\n2023-01-02,Taxi,9\n"
+        overlapping = first + b"2023-02-01,Rent,500\n"
+
+        result = importers.import_csv(self.user, BytesIO(first), self.columns, chunk_size=2)
+        self.assertEqual((result.imported, result.skipped_duplicates), (3, 0))
+        result = importers.import_csv(self.user, BytesIO(overlapping), self.columns, chunk_size=2)
+        self.assertEqual((result.imported, result.skipped_duplicates), (1, 3))
+
+        self.assertEqual(Transaction.objects.count(), 4)
+        self.assertEqual(sum(MonthlyRollup.objects.values_list('expense_count', flat=True)), 4)
+        self.assertEqual(
+            rollups.summary(self.user, year=2023, month=1)['total_expenses'], Decimal('15.00')
+        )
+
+    def test_fingerprinter_numbers_repeats(self):
+        fingerprints = importers.Fingerprinter()
+        rows = [(date(2023, 1, 1), 'Coffee', 3), (date(2023, 1, 1), ' coffee ', 3), (date(2023, 1, 2), 'Coffee', 3)]
+        self.assertEqual(
+            [fingerprints(*row) for row in rows + rows[:1]],
+            [importers.fingerprint(*rows[0]), importers.fingerprint(*rows[0], 1),
+             importers.fingerprint(*rows[2]), importers.fingerprint(*rows[0], 2)]
+        )
+
+class CategorizationTest(TestCase):
+    def tearDown(self):
+        categorization.clear_rules_cache()
+
+    def test_rule_priority_matches_keyword_order(self):
+        categorizer = categorization.Categorizer.from_keywords({
+            'Food': ['restaurant', 'cafe'],
+            'Transport': ['gas', 'bus'],
+        })
+        self.assertEqual(categorizer.match('Bus to the CAFE'), 'Food')
+        self.assertEqual(categorizer.match('Gas station'), 'Transport')
+        self.assertEqual(categorizer.match('Rent'), 'Other')
+        self.assertEqual(categorizer.match(''), 'Other')
+
+    def test_batch_categorization_uses_cached_ids(self):
+        descriptions = ['Grocery run', 'Taxi home', 'Monthly rent'] * 100
+        categorization.get_categorizer()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(3):  # Lookup, insert the missing categories, read their ids
+                ids = categorization.categorize_many(descriptions)
+        with self.assertNumQueries(0):
+            self.assertEqual(categorization.categorize_many(descriptions), ids)
+
+        names = dict(Category.objects.values_list('id', 'name'))
+        self.assertEqual([names[i] for i in ids[:3]], ['Food', 'Transport', 'Other'])
+
+    def test_cache_is_cleared_when_a_category_is_deleted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            category_id = categorization.categorize('Cafe latte')
+        Category.objects.get(id=category_id).delete()
+        self.assertNotEqual(categorization.categorize('Cafe latte'), category_id)
+
+    def test_category_ids_follow_changes_in_other_processes(self):
+        food = Category.objects.create(name='Food')
+        categorization.get_categorizer()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(categorization.category_ids(['Food']), {'Food': food.pk})
+
+        # Renamed by another worker: no signal here, only the version moves
+        Category.objects.filter(pk=food.pk).update(name='Groceries')
+        versioning.bump(versioning.CATEGORY_RULES)
+        categorization._rules_version_checked_at = 0
+        self.assertNotEqual(categorization.category_ids(['Food'])['Food'], food.pk)
+
+    def test_database_rules_override_keywords(self):
+        user = User.objects.create_user(username='rules', password='testpass')
+        other = User.objects.create_user(username='other', password='testpass')
+        travel = Category.objects.create(name='Travel')
+        CategoryRule.objects.create(pattern='avianca', category=travel)
+        CategoryRule.objects.create(pattern='taxi', category=travel, user=user)
+
+        names = dict(Category.objects.values_list('id', 'name'))
+        ids = categorization.categorize_many(['AVIANCA BOG-MDE', 'Taxi home'], user=user)
+        self.assertEqual([names.get(i) for i in ids], ['Travel', 'Travel'])
+        other_id = categorization.categorize('Taxi home', user=other)
+        self.assertEqual(Category.objects.get(id=other_id).name, 'Transport')
+
+    def test_compiled_rules_are_cached_until_the_version_changes(self):
+        travel = Category.objects.create(name='Travel')
+        categorization.get_categorizer()
+        with self.assertNumQueries(0):
+            categorization.get_categorizer()
+
+        # Saving a rule in this process invalidates the cache right away
+        CategoryRule.objects.create(pattern='avianca', category=travel)
+        self.assertEqual(categorization.get_categorizer().match('Avianca'), 'Travel')
+
+        # A rule edited by another worker is picked up on the next version check
+        CategoryRule.objects.update(pattern='latam')
+        versioning.bump(versioning.CATEGORY_RULES)
+        self.assertEqual(categorization.get_categorizer().match('Latam'), 'Other')
+        categorization._rules_version_checked_at = 0
+        with self.assertNumQueries(2):  # Version check, then reload the rules
+            self.assertEqual(categorization.get_categorizer().match('Latam'), 'Travel')
+
+class ImportJobTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.login(username='testuser', password='testpass')
+
+    def fake_parser(self, fileobj):
+        self.assertEqual(fileobj.read(), b'%PDF-statement')
+        return [
+            {'date': date(2023, 1, 1), 'description': 'Grocery store', 'amount': 45.67},
+            {'date': date(2023, 1, 2), 'description': 'Salary', 'amount': -1000, 'category': 'Income'},
+            {'date': date(2023, 1, 3), 'description': 'Taxi', 'amount': 12},
+        ]
+
+    def upload(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        return self.client.post('/api/transactions/import_pdf/', {'file': SimpleUploadedFile('jan.pdf', b'%PDF-statement')})
+
+    def test_worker_processes_queued_job(self):
+        from unittest import mock
+        response = self.upload()
+        self.assertEqual(Transaction.objects.count(), 0)
+
+        with mock.patch.dict(statements.PARSERS, {'bank_statement': self.fake_parser}):
+            self.assertEqual(jobs.work(once=True), 1)
+
+        status_response = self.client.get(response.data['status_url'])
+        self.assertEqual(status_response.data['status'], 'succeeded')
+        self.assertEqual(
+            [status_response.data[key] for key in ('total_rows', 'processed_rows', 'imported', 'skipped_duplicates')],
+            [3, 3, 3, 0]
+        )
+        self.assertEqual(Transaction.objects.get(description='Salary').category.name, 'Income')
+        self.assertIsNone(ImportJob.objects.get().content)
+
+        # Importing the same statement again only skips rows
+        self.upload()
+        with mock.patch.dict(statements.PARSERS, {'bank_statement': self.fake_parser}):
+            jobs.work(once=True)
+        job = ImportJob.objects.first()
+        self.assertEqual((job.imported, job.skipped_duplicates), (0, 3))
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    def test_failed_job_reports_error(self):
+        from unittest import mock
+        self.upload()
+        with mock.patch.dict(statements.PARSERS, {'bank_statement': mock.Mock(side_effect=ValueError('no tables'))}):
+            with self.assertLogs('transactions.jobs', 'ERROR'):
+                jobs.work(once=True)
+        job = ImportJob.objects.get()
+        self.assertEqual(job.status, ImportJob.FAILED)
+        self.assertIn('no tables', job.error)
+
+    def test_stale_running_job_is_requeued(self):
+        from datetime import timedelta
+        from io import BytesIO
+        job = jobs.enqueue(self.user, 'text', BytesIO(b'%PDF'))
+        self.assertEqual(jobs.claim().pk, job.pk)
+        self.assertIsNone(jobs.claim())
+
+        ImportJob.objects.update(heartbeat_at=timezone.now() - jobs.STALE_AFTER - timedelta(seconds=1))
+        jobs.requeue_stale()
+        self.assertEqual(jobs.claim().attempts, 2)
+
+    @skipUnless(find_spec('pdfplumber'), 'pdfplumber is not installed')
+    def test_parallel_page_extraction_keeps_order(self):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        from benchmarks.common import statement_pdf
+
+        content = statement_pdf(pages=10, lines_per_page=3)
+        serial = statements.extract_page_texts(content, workers=1)
+        with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context('spawn')) as pool:
+            self.assertEqual(statements.extract_page_texts(content, pool=pool, workers=2), serial)
+        self.assertEqual(len(serial), 10)
+        self.assertTrue(serial[9].startswith('2023-01-28 '))
+
+    def test_jobs_are_private(self):
+        from io import BytesIO
+        other = User.objects.create_user(username='other', password='testpass')
+        job = jobs.enqueue(other, 'text', BytesIO(b'%PDF'))
+        self.assertEqual(self.client.get(f'/api/import-jobs/{job.pk}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/web/import/jobs/{job.pk}/').status_code, 404)
+
+class StatementProfileTest(TestCase):
+    def test_profiles_parse_their_date_conventions(self):
+        cases = [
+            ('colombian', '05-01-2023 COMPRA EXITO 23,709.00 1,234,567.00', date(2023, 1, 5), 'COMPRA EXITO', 23709.0),
+            ('us', '01/05/2023 Store 123 $45.67', date(2023, 1, 5), 'Store 123', 45.67),
+            ('month_name', '05-Ene-2023 Taxi -25.50', date(2023, 1, 5), 'Taxi', -25.5),
+            ('iso', '2023-01-05 Cafe 3', date(2023, 1, 5), 'Cafe', 3.0),
+        ]
+        for name, line, parsed_date, description, amount in cases:
+            self.assertEqual(
+                statements.PROFILES[name].parse_line(line),
+                {'date': parsed_date, 'description': description, 'amount': amount}
+            )
+        self.assertIsNone(statements.PROFILES['us'].parse_line('13/45/2023 Bad date 1.00'))
+        self.assertIsNone(statements.PROFILES['us'].parse_line('Balance forward 1,000.00'))
+
+    def test_amounts_take_one_sign(self):
+        iso = statements.PROFILES['iso']
+        self.assertEqual(iso.parse_line('2023-01-05 Refund -$ 12.00')['amount'], -12.0)
+        self.assertEqual(iso.parse_line('2023-01-05 Refund $-12.00')['amount'], -12.0)
+        self.assertEqual(iso.parse_line('2023-01-05 Refund - -12.00')['description'], 'Refund -')
+        self.assertIsNone(iso.parse_line('2023-01-05 Fee -$-5'))
+        self.assertEqual(statements.PROFILES['iso'].parse_lines(['2023-01-05 Fee -$-5', '2023-01-06 Cafe 3']),
+                         [{'date': date(2023, 1, 6), 'description': 'Cafe', 'amount': 3.0}])
+
+    def test_balance_column_amounts_need_cents(self):
+        colombian = statements.PROFILES['colombian']
+        # '24' has no cents, so it stays in the description
+        self.assertEqual(colombian.parse_line('05-01-2023 RETIRO 24 50,000.00 950,000.00')['amount'], 50000.0)
+        retiro = colombian.parse_line('05-01-2023 RETIRO 24 50,000.00')
+        self.assertEqual((retiro['description'], retiro['amount']), ('RETIRO 24', 50000.0))
+        self.assertIsNone(colombian.parse_line('05-01-2023 RETIRO 24'))
+
+    def test_balance_column_is_optional(self):
+        colombian = statements.PROFILES['colombian']
+        compra = colombian.parse_line('05-01-2023 COMPRA EXITO 50,000.00')
+        self.assertEqual((compra['description'], compra['amount']), ('COMPRA EXITO', 50000.0))
+
+    def test_profile_is_detected_from_first_matching_page(self):
+        pages = ['Cover page', 'Date Description Amount\n01/05/2023 Rent 900.00\n01/06/2023 Bus 2.50\nPrinted 2023-02-01']
+        self.assertIs(statements.detect_profile(pages), statements.PROFILES['us'])
+        self.assertIsNone(statements.detect_profile(['No transactions']))
+
+    def test_bank_statement_rows(self):
+        import pandas as pd
+        from io import BytesIO
+        from unittest import mock
+        table = pd.DataFrame({
+            'fecha': ['01-02-2023', '02-02-2023', '03-02-2023', 'Total'],
+            'descripcion': ['COMPRA EXITO', 'ABONO NOMINA', float('nan'), ''],
+            'valor': ['23,709.00', '1,000.00', '50.00', '24,759.00'],
+            'saldo': ['976,291.00', '1,976,291.00', '1,976,241.00', ''],
+        })
+        with mock.patch.object(statements.tabula_worker, 'read_tables', return_value=[table]):
+            rows = statements.parse_bank_statement(BytesIO(b''))
+        self.assertEqual([(row['description'], row['amount']) for row in rows], [
+            ('COMPRA EXITO', -23709.0), ('ABONO NOMINA', 1000.0), ('Transaction 2023-02-03', -50.0),
+        ])
+
+    def test_extraction_worker_reuses_one_thread(self):
+        import threading
+        from transactions.tabula_worker import ExtractionWorker
+
+        setups = []
+        worker = ExtractionWorker(
+            setup=lambda: setups.append(threading.current_thread()) or 'vm',
+            handler=lambda state, content: (state, content.upper(), threading.current_thread()),
+        )
+        results = [worker.submit(content) for content in (b'a', b'b')]
+        self.assertEqual([future.result(5)[:2] for future in results], [('vm', b'A'), ('vm', b'B')])
+        self.assertEqual(len(setups), 1)
+        self.assertIs(results[0].result()[2], results[1].result()[2])
+        self.assertIsNot(setups[0], threading.current_thread())
+
+        with self.assertRaises(ZeroDivisionError), self.assertLogs('transactions.tabula_worker', 'ERROR'):
+            ExtractionWorker(setup=lambda: 1 / 0, handler=None).extract(b'a', timeout=5)
+
+
+class APITokenTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def tearDown(self):
+        tokens.clear_credential_cache()
+
+    def test_token_round_trip_without_queries(self):
+        token = tokens.issue_token(self.user)
+        with self.assertNumQueries(0):  # The stamp read at issue is cached
+            user = tokens.verify_token(token)
+        self.assertEqual((user.pk, user.username), (self.user.pk, 'testuser'))
+
+    def test_tokens_are_revoked_with_the_user(self):
+        token = tokens.issue_token(self.user)
+        self.user.set_password('changed')
+        self.user.save()
+        with self.assertRaisesMessage(tokens.InvalidToken, 'revoked'):
+            tokens.verify_token(token)
+
+        token = tokens.issue_token(self.user)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.verify_token(token)
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.issue_token(self.user)
+
+        self.user.is_active = True
+        self.user.save()
+        token = tokens.issue_token(self.user)
+        # Deactivated by another process: noticed once this process's stamp expires
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(tokens.verify_token(token).pk, self.user.pk)
+        tokens._stamps[self.user.pk] = (0, tokens._stamps[self.user.pk][1])
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.verify_token(token)
+
+        self.user.save()  # Active again
+        token = tokens.issue_token(self.user)
+        self.user.delete()
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.verify_token(token)
+
+    def test_tampered_and_expired_tokens_are_rejected(self):
+        token = tokens.issue_token(self.user)
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.verify_token(token[:-1] + ('A' if token[-1] != 'A' else 'B'))
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.verify_token(token, max_age=-1)
+
+    def test_verified_credentials_are_cached(self):
+        from unittest import mock
+
+        self.assertIsNone(tokens.cached_user('testuser', 'testpass123'))
+        tokens.remember_credentials('testuser', 'testpass123', self.user)
+        self.assertEqual(tokens.cached_user('testuser', 'testpass123').pk, self.user.pk)
+        self.assertIsNone(tokens.cached_user('testuser', 'wrong'))
+
+        with mock.patch.object(tokens, 'CREDENTIAL_CACHE_TTL', 0):
+            tokens.remember_credentials('testuser', 'testpass123', self.user)
+        self.assertIsNone(tokens.cached_user('testuser', 'testpass123'))
+
+    def test_password_change_forgets_cached_credentials(self):
+        tokens.remember_credentials('testuser', 'testpass123', self.user)
+        self.user.set_password('changed')
+        self.user.save()
+        self.assertIsNone(tokens.cached_user('testuser', 'testpass123'))
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.food = Category.objects.create(name="Food")
+        self.client.login(username='testuser', password='testpass')
+        Transaction.objects.create(user=self.user, date=date(2024, 3, 5), description="Lunch", category=self.food, amount=30)
+
+    def test_unchanged_data_is_not_modified_without_aggregates(self):
+        response = self.client.get('/api/transactions/summary/')
+        etag = response['ETag']
+        self.assertEqual(response.json()['total_expenses'], 30.0)
+
+        with self.assertNumQueries(3):  # Session, user, data version
+            response = self.client.get('/api/transactions/summary/', HTTP_IF_NONE_MATCH=f'W/{etag}')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        with self.assertNumQueries(3):  # Same again, the body comes from the response cache
+            response = self.client.get('/api/transactions/summary/')
+        self.assertEqual(response.json()['total_expenses'], 30.0)
+
+    def test_writes_change_the_etag(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        etag = self.client.get('/api/transactions/').headers['ETag']
+        transaction = Transaction.objects.get()
+        transaction.description = "Lunch with the team"  # Same totals, different list
+        transaction.save()
+
+        response = self.client.get('/api/transactions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['description'], "Lunch with the team")
+        etag = response['ETag']
+
+        importers.import_csv(self.user, SimpleUploadedFile('s.csv', b'date,description,amount\n2024-03-09,Taxi,12\n'),
+                             {'date': 'date', 'description': 'description', 'amount': 'amount'})
+        response = self.client.get('/api/transactions/summary/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['total_expenses'], 42.0)
+
+        etag = response['ETag']
+        self.food.name = "Groceries"
+        self.food.save()
+        response = self.client.get('/api/transactions/summary/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['category_summary'][0]['category__name'], "Groceries")
+
+    def test_etags_are_per_user(self):
+        other = User.objects.create_user(username='other', password='testpass')
+        self.assertNotEqual(caching.etag(self.user.pk), caching.etag(other.pk))
+        self.assertTrue(caching.matches('"a", W/"b"', '"b"'))
+        self.assertTrue(caching.matches('*', '"b"'))
+        self.assertFalse(caching.matches('"a"', '"b"'))
+
+
+class ColdStartTest(SimpleTestCase):
+    # Loading the WSGI app and every URLconf takes ~0.3s locally; pandas alone added ~0.25s
+    BUDGET_SECONDS = 2.0
+    HEAVY_MODULES = ('pandas', 'numpy', 'plotly', 'pdfplumber', 'tabula')
+
+    def test_startup_skips_heavy_imports_within_budget(self):
+        import json
+        import subprocess
+        import sys
+        from django.conf import settings
+
+        probe = (
+            "import json, sys, time\n"
+            "start = time.perf_counter()\n"
+            "from django.core.wsgi import get_wsgi_application\n"
+            "from django.urls import get_resolver\n"
+            "get_wsgi_application()\n"
+            "get_resolver().url_patterns\n"  # Imports the views of every app
+            "print(json.dumps([time.perf_counter() - start, sorted(sys.modules)]))\n"
+        )
+        output = subprocess.run([sys.executable, '-c', probe], cwd=settings.BASE_DIR,
+                                check=True, capture_output=True, text=True).stdout
+        elapsed, modules = json.loads(output.splitlines()[-1])
+
+        self.assertEqual([name for name in self.HEAVY_MODULES if name in modules], [])
+        self.assertLess(elapsed, self.BUDGET_SECONDS)
+
+
+class FastAPIConnectionTest(SimpleTestCase):
+    def test_shutdown_closes_the_connection_of_every_pool_thread(self):
+        import asyncio
+        import threading
+        from unittest import mock
+        import fastapi_app
+
+        closed_on = set()
+        with mock.patch.object(fastapi_app.connections, 'close_all',
+                               side_effect=lambda: closed_on.add(threading.get_ident())):
+            asyncio.run(fastapi_app.close_db_connections())
+        self.assertEqual(len(closed_on), fastapi_app.DB_THREADS)
+
+
+class FastAPISummaryTest(TestCase):
+    def test_totals_are_numbers(self):
+        import json
+        from unittest import mock
+        from asgiref.sync import async_to_sync, sync_to_async
+        from starlette.requests import Request
+        import fastapi_app
+
+        user = User.objects.create_user(username='testuser', password='testpass')
+        food = Category.objects.create(name="Food")
+        Transaction.objects.create(user=user, date=date(2024, 3, 5), description="Lunch", category=food, amount='12.50')
+        request = Request({'type': 'http', 'method': 'GET', 'path': '/summary/', 'query_string': b'', 'headers': [],
+                           'scheme': 'http', 'server': ('testserver', 80)})
+
+        async def run_on_test_thread(func, *args, **kwargs):
+            # The pool threads' connections would not see the test's transaction
+            return await sync_to_async(func)(*args, **kwargs)
+
+        with mock.patch.object(fastapi_app, 'run_db', run_on_test_thread):
+            response = async_to_sync(fastapi_app.get_summary)(request, user=user, month=3, year=2024)
+        body = json.loads(response.body)
+        self.assertEqual(body['category_summary'], [{'category__name': 'Food', 'total': 12.5, 'count': 1}])
+        self.assertIsInstance(body['total_expenses'], float)
+        self.assertIsInstance(body['net_amount'], float)
+
+
+class FastAPIBatchValidationTest(SimpleTestCase):
+    def test_items_are_checked_against_the_model_limits(self):
+        import fastapi_app
+        from fastapi.testclient import TestClient
+
+        fastapi_app.app.dependency_overrides[fastapi_app.authenticate_user] = lambda: User(pk=1)
+        self.addCleanup(fastapi_app.app.dependency_overrides.clear)
+        client = TestClient(fastapi_app.app)
+        item = {'date': '2024-03-05', 'description': 'Lunch', 'amount': 30}
+        response = client.post('/transactions/batch/', json={
+            'create': [item, {**item, 'description': 'x' * 256}, {**item, 'amount': '12.345'}],
+            'update': [{'id': 1, 'amount': 123456789}],
+        })
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(sorted(tuple(error['loc'][1:3]) for error in response.json()['detail']),
+                         [('create', 1), ('create', 2), ('update', 0)])
+
+
+class TransactionBatchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        categorization.clear_rules_cache()
+        categorization.clear_category_cache()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.food = Category.objects.create(name="Food")
+        self.client.login(username='testuser', password='testpass')
+        self.lunch = Transaction.objects.create(user=self.user, date=date(2024, 3, 5), description="Lunch", category=self.food, amount=30)
+        self.taxi = Transaction.objects.create(user=self.user, date=date(2024, 3, 6), description="Taxi", amount=12)
+
+    def test_batch_creates_updates_and_deletes(self):
+        response = self.client.post('/api/transactions/batch/', {
+            'create': [
+                {'date': '2024-03-07', 'description': 'Train ticket', 'amount': '8.50'},
+                {'date': '2024-04-01', 'description': 'Salary', 'amount': '-1000', 'category': self.food.pk},
+            ],
+            'update': [{'id': self.lunch.pk, 'amount': '35.00', 'category': None}],
+            'delete': [self.taxi.pk],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+
+        self.assertEqual([row['description'] for row in body['created']], ['Train ticket', 'Salary'])
+        self.assertEqual(body['created'][0]['category_name'], 'Transport')  # Auto-categorized
+        self.assertEqual((body['updated'][0]['amount'], body['updated'][0]['category']), ('35.00', None))
+        self.assertEqual(body['deleted'], [self.taxi.pk])
+        self.assertFalse(Transaction.objects.filter(pk=self.taxi.pk).exists())
+
+        # Rollups followed every change despite the bulk writes
+        incremental = rollups.summary(self.user)
+        rollups.rebuild(self.user)
+        self.assertEqual(incremental, rollups.summary(self.user))
+        self.assertEqual(incremental['total_expenses'], Decimal('43.50'))
+
+    def test_invalid_item_rejects_the_whole_batch(self):
+        other = User.objects.create_user(username='other', password='testpass')
+        theirs = Transaction.objects.create(user=other, date=date(2024, 3, 5), description="Rent", amount=500)
+
+        response = self.client.post('/api/transactions/batch/', {
+            'create': [{'date': '2024-03-07', 'description': 'Bus', 'amount': '2', 'category': 999}],
+            'update': [{'id': self.lunch.pk, 'amount': '1'}, {'id': theirs.pk, 'amount': '1'}],
+            'delete': [self.lunch.pk],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {
+            'create': {'0': ['Category 999 not found']},
+            'update': {'1': [f'Transaction {theirs.pk} not found']},
+            'delete': {'0': [f'Transaction {self.lunch.pk} appears more than once in the batch']},
+        })
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Transaction.objects.get(pk=self.lunch.pk).amount, Decimal('30.00'))
+
+        response = self.client.post('/api/transactions/batch/', {'create': [{'description': 'Bus'}]},
+                                    content_type='application/json')
+        self.assertEqual(set(response.json()['create']['0']), {'date', 'amount'})
+
+    def test_queries_do_not_grow_with_the_batch(self):
+        from django.test.utils import CaptureQueriesContext
+        from django.db import connection
+
+        def post(count):
+            items = [{'date': '2024-03-07', 'description': f'Cafe {i}', 'amount': '3'} for i in range(count)]
+            updates = [{'id': self.lunch.pk, 'description': f'Lunch {count}'}]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/api/transactions/batch/', {'create': items, 'update': updates},
+                                            content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        post(1)  # Compiles and caches the categorization rules
+        self.assertEqual(post(5), post(100))  # 100 rows still fit one INSERT within SQLite's parameter limit
+
+
+class TransactionExportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.login(username='testuser', password='testpass')
+        food = Category.objects.create(name="Food")
+        Transaction.objects.create(user=self.user, date=date(2024, 3, 5), description="Lunch, downtown", category=food, amount=30)
+        Transaction.objects.create(user=self.user, date=date(2024, 2, 6), description="Salary", amount=-100)
+        other = User.objects.create_user(username='other', password='testpass')
+        Transaction.objects.create(user=other, date=date(2024, 3, 5), description="Rent", amount=500)
+
+    def test_csv_export_streams_the_history(self):
+        import csv
+        import io
+
+        response = self.client.get('/api/transactions/export/csv/')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="transactions.csv"')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([(row['date'], row['description'], row['amount'], row['category']) for row in rows], [
+            ('2024-02-06', 'Salary', '-100.00', ''),
+            ('2024-03-05', 'Lunch, downtown', '30.00', 'Food'),
+        ])
+
+    def test_ndjson_export_and_reimport(self):
+        import io
+        import json
+
+        response = self.client.get('/api/transactions/export/ndjson/')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['amount'] for line in lines], ['-100.00', '30.00'])
+        self.assertTrue(json.loads(lines[0])['created_at'].endswith('Z'))
+
+        # The CSV columns are the ones the importer reads
+        body = b''.join(exports.stream(self.user, 'csv'))
+        result = importers.import_csv(self.user, io.BytesIO(body),
+                                      {'date': 'date', 'description': 'description', 'amount': 'amount', 'category': 'category'})
+        self.assertEqual((result.imported, result.rejected), (2, 0))
+
+        self.assertEqual(self.client.get('/api/transactions/export/xml/').status_code, 404)
+
+    def test_export_ignores_the_accept_header(self):
+        for kind, accept in [('csv', 'text/csv'), ('ndjson', 'application/x-ndjson'), ('csv', 'application/json')]:
+            response = self.client.get(f'/api/transactions/export/{kind}/', HTTP_ACCEPT=accept)
+            self.assertEqual(response.status_code, 200, accept)
+            self.assertEqual(response['Content-Type'], exports.CONTENT_TYPES[kind])
+            self.assertTrue(b''.join(response.streaming_content))
+
+    def test_parquet_export_without_pyarrow(self):
+        from unittest import mock
+
+        with mock.patch.object(columnar, 'available', return_value=False):
+            response = self.client.get('/api/transactions/export/parquet/')
+            self.assertEqual(response.status_code, 501)
+            self.assertFalse(response.streaming)
+            self.assertEqual(response.json(), {'error': columnar.UNAVAILABLE})
+            self.assertEqual(self.client.post('/api/transactions/import_parquet/').status_code, 501)
+
+    @skipUnless(find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_parquet_round_trip(self):
+        import io
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        response = self.client.get('/api/transactions/export/parquet/')
+        body = b''.join(response.streaming_content)
+        table = pq.read_table(io.BytesIO(body))
+        self.assertEqual(table.schema.field('amount').type, pa.decimal128(10, 2))
+        self.assertEqual(table.column('amount').to_pylist(), [Decimal('-100.00'), Decimal('30.00')])
+        self.assertEqual(table.column('category').to_pylist(), [None, 'Food'])
+
+        # Into another user's history: amounts exact, category names kept, the rest auto-categorized
+        self.client.login(username='other', password='testpass')
+        response = self.client.post('/api/transactions/import_parquet/', {'file': SimpleUploadedFile('t.parquet', body)})
+        self.assertEqual(response.json()['imported'], 2)
+        other = User.objects.get(username='other')
+        self.assertEqual(
+            list(Transaction.objects.filter(user=other, description__in=['Salary', 'Lunch, downtown'])
+                 .order_by('date').values_list('amount', 'category__name')),
+            [(Decimal('-100.00'), 'Other'), (Decimal('30.00'), 'Food')],
+        )
+        result = columnar.import_parquet(other, io.BytesIO(body))
+        self.assertEqual((result.imported, result.skipped_duplicates), (0, 2))
+
+    @skipUnless(find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_parquet_import_casts_and_validates(self):
+        import io
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        def parquet(**columns):
+            buffer = io.BytesIO()
+            pq.write_table(pa.table(columns), buffer)
+            buffer.seek(0)
+            return buffer
+
+        result = columnar.import_parquet(self.user, parquet(
+            date=[date(2024, 5, 1), None, date(2024, 5, 2)],
+            description=['Taxi', 'Bus', ' '],
+            amount=[12.5, 3.0, 4.0],
+        ))
+        self.assertEqual((result.imported, result.rejected), (1, 2))
+        self.assertEqual(result.errors, ['Row 2: empty date', 'Row 3: empty description'])
+        self.assertEqual(Transaction.objects.get(user=self.user, description='Taxi').amount, Decimal('12.50'))
+        incremental = rollups.summary(self.user)  # The raw inserts still reach the rollups
+        rollups.rebuild(self.user)
+        self.assertEqual(incremental, rollups.summary(self.user))
+
+        with self.assertRaisesMessage(ValueError, 'Column(s) not found in Parquet file: amount'):
+            columnar.import_parquet(self.user, parquet(date=[date(2024, 5, 1)], description=['Taxi']))
+
+class TransactionSearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.login(username='testuser', password='testpass')
+        for day, description in [(1, 'STARBUCKS COFFEE #12'), (2, 'Café Olé Bakery'), (3, 'Coffee beans, coffee filters'),
+                                 (4, 'Shell gas station')]:
+            Transaction.objects.create(user=self.user, date=date(2024, 3, day), description=description, amount=10)
+        other = User.objects.create_user(username='other', password='testpass')
+        Transaction.objects.create(user=other, date=date(2024, 3, 5), description='Starbucks', amount=10)
+
+    def descriptions(self, text):
+        return set(search.matching(Transaction.objects.filter(user=self.user), text).values_list('description', flat=True))
+
+    def test_words_match_word_prefixes(self):
+        self.assertEqual(self.descriptions('star cof'), {'STARBUCKS COFFEE #12'})
+        self.assertEqual(self.descriptions('COFFEE'), {'STARBUCKS COFFEE #12', 'Coffee beans, coffee filters'})
+        self.assertEqual(self.descriptions('cafe ole'), {'Café Olé Bakery'})
+        self.assertEqual(self.descriptions('bucks'), set())  # Word starts only
+        self.assertEqual(len(self.descriptions('  ')), 4)
+
+    def test_index_follows_writes(self):
+        coffee = Transaction.objects.get(user=self.user, description__startswith='STARBUCKS')
+        coffee.description = 'Dunkin Donuts'
+        coffee.save()
+        Transaction.objects.filter(description__startswith='Shell').update(description='Shell coffee kiosk')
+        Transaction.objects.filter(description__startswith='Coffee').delete()
+        self.assertEqual(self.descriptions('coffee'), {'Shell coffee kiosk'})
+        self.assertEqual(self.descriptions('dunk'), {'Dunkin Donuts'})
+
+    def test_substring_fallback(self):
+        from unittest import mock
+
+        with mock.patch.object(search, '_uses_fts5', return_value=False):
+            self.assertEqual(self.descriptions('star cof'), {'STARBUCKS COFFEE #12'})
+            self.assertEqual(search.ranked_ids(Transaction.objects.filter(user=self.user), 'coffee', 1),
+                             [Transaction.objects.get(description__startswith='Coffee').pk])
+
+    def test_list_views_filter_by_description(self):
+        response = self.client.get('/api/web/transactions/', {'search': 'coffee'})
+        self.assertEqual({t.description for t in response.context['transactions']},
+                         {'STARBUCKS COFFEE #12', 'Coffee beans, coffee filters'})
+        response = self.client.get('/api/transactions/', {'search': 'starbucks'})
+        self.assertEqual([row['description'] for row in response.json()['results']], ['STARBUCKS COFFEE #12'])
+
+    def test_ranked_search_endpoint(self):
+        response = self.client.get('/api/transactions/search/', {'q': 'coffee'})
+        results = response.json()['results']
+        # Two mentions rank above one
+        self.assertEqual([row['description'] for row in results], ['Coffee beans, coffee filters', 'STARBUCKS COFFEE #12'])
+        self.assertEqual(results[0]['amount'], '10.00')
+        response = self.client.get('/api/transactions/search/', {'q': 'coffee', 'limit': 1})
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertEqual(self.client.get('/api/transactions/search/', {'q': 'coffee', 'limit': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/transactions/search/').json(), {'results': []})
+
+class TransactionListViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.login(username='testuser', password='testpass')
+        self.food = Category.objects.create(name='Food')
+        self.transport = Category.objects.create(name='Transport')
+        self.fun = Category.objects.create(name='Entertainment')
+        for day, category in enumerate([self.food, self.transport, self.fun, None], start=1):
+            Transaction.objects.create(user=self.user, date=date(2024, 3, day), description=f'Item {day}',
+                                       category=category, amount=10)
+
+    def descriptions(self, params):
+        response = self.client.get('/api/web/transactions/', params)
+        return [t.description for t in response.context['transactions']]
+
+    def test_filters_by_category_ids(self):
+        self.assertEqual(self.descriptions({'category': [self.food.pk]}), ['Item 1'])
+        self.assertEqual(self.descriptions({'category': [self.food.pk, self.fun.pk]}), ['Item 3', 'Item 1'])
+        response = self.client.get('/api/web/transactions/', {'category': [self.food.pk, self.fun.pk]})
+        self.assertEqual(response.context['selected_category_ids'], {self.food.pk, self.fun.pk})
+        self.assertContains(response, f'<option value="{self.fun.pk}" selected>', html=False)
+
+    def test_names_still_match(self):
+        # Links from before the multi-select carried a name fragment
+        self.assertEqual(self.descriptions({'category': 'TRANS'}), ['Item 2'])
+        self.assertEqual(self.descriptions({'category': ['foo', self.fun.pk]}), ['Item 3', 'Item 1'])
+        self.assertEqual(self.descriptions({'category': '²'}), [])  # Not an id
+
+    def test_out_of_range_id_is_a_name(self):
+        # Too large for the id column, so it is matched as a name instead
+        self.assertEqual(self.descriptions({'category': '99999999999999999999999'}), [])
+        self.assertEqual(self.descriptions({'category': ['99999999999999999999999', self.fun.pk]}), ['Item 3'])
+
+    def test_fixed_number_of_queries(self):
+        self.client.get('/api/web/transactions/', {'search': 'item'})  # Search looks up its index once per process
+        for params in [{}, {'category': [self.food.pk, self.transport.pk]}, {'category': 'food', 'search': 'item'}]:
+            # Session, user, the page with its categories joined, the dropdown
+            with self.assertNumQueries(4):
+                self.client.get('/api/web/transactions/', params)
+
+        for day in range(10, 25):
+            Transaction.objects.create(user=self.user, date=date(2024, 3, day), description=f'Item {day}',
+                                       category=self.food, amount=10)
+        with self.assertNumQueries(4):
+            self.client.get('/api/web/transactions/')
@@ -0,0 +1,126 @@
+"""
+API authentication without a password hash per request.
+
+Bearer tokens are signed with SECRET_KEY and carry the user id, username,
+issue time and a stamp derived from the user's password hash. They are
+valid until API_TOKEN_MAX_AGE seconds after issue, or until the stamp no
+longer matches: changing the password, deactivating or deleting the user
+revokes every token issued before. Current stamps are cached per process
+for API_CREDENTIAL_CACHE_TTL seconds, so checking a token needs at most one
+query a minute per user and never a password hash; this process forgets a
+user's stamp as soon as the user is saved or deleted, other processes
+within the TTL.
+
+Basic credentials that were verified recently are remembered in a small
+process-local LRU for API_CREDENTIAL_CACHE_TTL seconds, keyed by an HMAC of
+the username and password rather than the password itself.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.utils.crypto import salted_hmac
+
+TOKEN_SALT = 'transactions.tokens'
+TOKEN_MAX_AGE = getattr(settings, 'API_TOKEN_MAX_AGE', 60 * 60)
+
+CREDENTIAL_CACHE_TTL = getattr(settings, 'API_CREDENTIAL_CACHE_TTL', 60)
+MAX_CACHED_CREDENTIALS = 1024
+
+_credentials = OrderedDict()  # credential digest -> (expires at, user id, username)
+_stamps = OrderedDict()  # user id -> (expires at, stamp or None for inactive and deleted users)
+_credentials_lock = threading.Lock()
+
+
+class InvalidToken(Exception):
+    """The token is malformed, tampered with, expired or revoked"""
+
+
+def _token_user(user_id, username):
+    # Routes only need the primary key (and the name for display), so the
+    # user is rebuilt from the token instead of being loaded
+    return User(pk=user_id, username=username)
+
+
+def _current_stamp(user_id):
+    """The stamp tokens of ``user_id`` must carry, None if the user is inactive or gone"""
+    now = time.monotonic()
+    with _credentials_lock:
+        cached = _stamps.get(user_id)
+        if cached is not None and cached[0] > now:
+            _stamps.move_to_end(user_id)
+            return cached[1]
+
+    password = User.objects.filter(pk=user_id, is_active=True).values_list('password', flat=True).first()
+    stamp = None if password is None else salted_hmac(TOKEN_SALT, password, algorithm='sha256').hexdigest()[:16]
+    with _credentials_lock:
+        _stamps[user_id] = (now + CREDENTIAL_CACHE_TTL, stamp)
+        _stamps.move_to_end(user_id)
+        while len(_stamps) > MAX_CACHED_CREDENTIALS:
+            _stamps.popitem(last=False)
+    return stamp
+
+
+def issue_token(user):
+    """Return a signed bearer token for ``user``; raises InvalidToken for an inactive user"""
+    stamp = _current_stamp(user.pk)
+    if stamp is None:
+        raise InvalidToken('User is inactive or does not exist')
+    return signing.dumps({'id': user.pk, 'username': user.username, 'stamp': stamp}, salt=TOKEN_SALT)
+
+
+def verify_token(token, max_age=None):
+    """Return the user a token was issued to; raises InvalidToken"""
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT, max_age=TOKEN_MAX_AGE if max_age is None else max_age)
+    except signing.BadSignature as e:  # SignatureExpired is a subclass
+        raise InvalidToken(str(e)) from e
+    stamp = payload.get('stamp')
+    if stamp is None or stamp != _current_stamp(payload['id']):
+        raise InvalidToken('Token has been revoked')
+    return _token_user(payload['id'], payload['username'])
+
+
+def _credential_key(username, password):
+    return salted_hmac(TOKEN_SALT, f'{username}\0{password}', algorithm='sha256').hexdigest()
+
+
+def cached_user(username, password):
+    """The user for recently verified credentials, or None"""
+    key = _credential_key(username, password)
+    with _credentials_lock:
+        cached = _credentials.get(key)
+        if cached is None:
+            return None
+        expires_at, user_id, username = cached
+        if expires_at <= time.monotonic():
+            del _credentials[key]
+            return None
+        _credentials.move_to_end(key)
+    return _token_user(user_id, username)
+
+
+def remember_credentials(username, password, user):
+    key = _credential_key(username, password)
+    with _credentials_lock:
+        _credentials[key] = (time.monotonic() + CREDENTIAL_CACHE_TTL, user.pk, user.username)
+        _credentials.move_to_end(key)
+        while len(_credentials) > MAX_CACHED_CREDENTIALS:
+            _credentials.popitem(last=False)
+
+
+def forget_user(user_id):
+    """Drop this process's cached credentials and token stamp for a user, e.g. after a password change"""
+    with _credentials_lock:
+        for key in [key for key, cached in _credentials.items() if cached[1] == user_id]:
+            del _credentials[key]
+        _stamps.pop(user_id, None)
+
+
+def clear_credential_cache():
+    with _credentials_lock:
+        _credentials.clear()
+        _stamps.clear()
@@ -4,7 +4,9 @@ from . import views
 
 router = DefaultRouter()
 router.register(r'categories', views.CategoryViewSet)
+router.register(r'category-rules', views.CategoryRuleViewSet)
 router.register(r'transactions', views.TransactionViewSet)
+router.register(r'import-jobs', views.ImportJobViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -17,4 +19,5 @@ urlpatterns = [
     path('web/categories/add/', views.category_create, name='category_create'),
     path('web/import/csv/', views.import_csv_view, name='import_csv'),
     path('web/import/pdf/', views.import_pdf_view, name='import_pdf'),
+    path('web/import/jobs/<int:pk>/', views.import_job_detail, name='import_job_detail'),
 ]
\ No newline at end of file
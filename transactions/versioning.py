@@ -0,0 +1,44 @@
+"""
+Version counters stored in the database.
+
+Writers bump a counter when the data behind a cache changes; readers compare
+the counter against the version their cached copy was built from. One
+indexed lookup tells any process whether its cache is still current.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import VersionCounter
+
+CATEGORY_RULES = 'category_rules'
+# Data every user's reads depend on, such as category names
+GLOBAL_DATA = 'data'
+
+
+def user_data(user_id):
+    """Key of the counter bumped on every write to ``user_id``'s transactions"""
+    return f'user:{user_id}'
+
+
+def bump(key):
+    """Increment the counter for ``key``, creating it on first use"""
+    counter = VersionCounter.objects.filter(key=key)
+    if counter.update(value=F('value') + 1):
+        return
+    try:
+        with transaction.atomic():
+            VersionCounter.objects.create(key=key, value=1)
+    except IntegrityError:
+        # Another writer created the counter first
+        counter.update(value=F('value') + 1)
+
+
+def get_versions(keys):
+    """Current value for each key; counters that were never bumped are 0"""
+    versions = dict.fromkeys(keys, 0)
+    versions.update(VersionCounter.objects.filter(key__in=keys).values_list('key', 'value'))
+    return versions
+
+
+def get_version(key):
+    return get_versions([key])[key]